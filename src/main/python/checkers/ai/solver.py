@@ -6,25 +6,84 @@
 
 The Pure Monte Carlo game search algorithm is described on https://en.wikipedia.org/wiki/Monte_Carlo_tree_search#Pure_Monte_Carlo_game_search
 """
+import multiprocessing
+import os
 import random
-from asyncio import Event
-from copy import deepcopy
-from math import isclose
-from statistics import mean, stdev
-from typing import Final
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from math import inf, isclose, log, sqrt
+from multiprocessing.context import SpawnContext
+from multiprocessing.synchronize import Event
+from typing import Callable, Final
 
 from checkers.ai.util import print_time
+from checkers.model.rules import BOARD_SHAPE, warm_caches
 from checkers.model.state import CheckersState
 from checkers.model.util import CheckersGameResult, CheckersMove, CheckersPlayer
 
 MAX_RECURSION_DEPTH: Final[int] = 200
+UCB1_EXPLORATION_CONSTANT: Final[float] = sqrt(2)  # Weight of the uncertainty of the score of a move when choosing the move for the next playout.
+PLAYOUT_BATCH_SIZE: Final[int] = 4  # Maximum number of playouts for one move that a worker process runs at once.
+CANCELLED_CHECK_INTERVAL: Final[int] = 32  # Number of plies after which a running playout checks whether it has been cancelled.
+PLAYOUT_WORKER_COUNT: Final[int] = os.cpu_count() or 1  # Number of processes that run playouts in parallel.
+# Worker processes are started with the spawn method, since forking a process that runs multiple threads, like the GUI thread and the search thread, can cause deadlocks.
+PLAYOUT_PROCESS_CONTEXT: Final[SpawnContext] = multiprocessing.get_context("spawn")
+PRINT_SCORES: Final[bool] = __debug__  # Print the scores of all legal moves after each search (only in debug mode, like the processing time).
+
+_worker_cancelled_event: Event | None = None  # Cancelled event of the playout executor that the current worker process belongs to.
+
+
+def create_cancelled_event() -> Event:
+    """ Create and return an event that can be used to cancel a search, which can be shared with the worker processes of a playout executor. """
+
+    return PLAYOUT_PROCESS_CONTEXT.Event()
+
+
+def create_playout_executor(cancelled_event: Event) -> ProcessPoolExecutor:
+    """ Create and return a process pool that can be used to run playouts in parallel.
+
+    The passed cancelled_event, which must have been created with create_cancelled_event(), is shared with all worker processes of the returned process pool.
+    It must be the same event that is passed to pure_monte_carlo_game_search() when this process pool is used.
+    """
+
+    # A multiprocessing event can only be shared with other processes through inheritance, therefore pass it on creation of the worker processes.
+    executor: Final[ProcessPoolExecutor] = ProcessPoolExecutor(max_workers=PLAYOUT_WORKER_COUNT, mp_context=PLAYOUT_PROCESS_CONTEXT,
+                                                               initializer=_initialize_playout_worker, initargs=(cancelled_event,))
+
+    # The process pool only starts worker processes when tasks are submitted to it, and starting a worker process takes some time.
+    # Start all worker processes now, so that the first search does not have to wait for them.
+    for _ in range(PLAYOUT_WORKER_COUNT):
+        executor.submit(_do_nothing)
+
+    return executor
+
+
+def _do_nothing():
+    """ Do nothing. This function can be submitted to a process pool to start a worker process. """
+
+    pass
+
+
+def _initialize_playout_worker(cancelled_event: Event):
+    """ Store the passed cancelled_event in the current worker process and create the cached tables of the rules for the standard board shape. """
+
+    global _worker_cancelled_event
+    _worker_cancelled_event = cancelled_event
+
+    # A new worker process starts without any of the cached tables of the rules, create them before the first playouts are run.
+    warm_caches(*BOARD_SHAPE)
 
 
 @print_time("processing time")
-def pure_monte_carlo_game_search(state: CheckersState, playout_count_per_move: int, cancelled_event: Event) -> CheckersMove | None:
+def pure_monte_carlo_game_search(state: CheckersState, playout_count_per_move: int, executor: ProcessPoolExecutor, cancelled_event: Event) -> CheckersMove | None:
     """ Use Pure Monte Carlo game search with the passed number of playouts per move to find and return the best move for the passed state.
     Return None if there are no legal moves for the passed state.
 
+    The passed playout_count_per_move is the average number of playouts per move:
+    the playouts are divided over the legal moves with the UCB1 algorithm, so that promising moves get more playouts than bad moves.
+
+    The playouts are run in small batches by the worker processes of the passed executor, which must have been created with create_playout_executor().
+    This function runs the UCB1 algorithm: each time a worker process is free, it gets a batch for the move that the scores of all finished playouts point to.
+
     The passed cancelled_event indicates whether the search has been cancelled from outside this function by another thread.
     If cancelled_event becomes set, this function will stop as soon as possible and return None.
 
@@ -39,30 +98,121 @@ def pure_monte_carlo_game_search(state: CheckersState, playout_count_per_move: i
     if len(legal_moves) == 1:
         return legal_moves[0]
 
-    # Determine score and uncertainty for each legal move.
-    scores: Final[dict[CheckersMove: tuple[float, float]]] = {}
-    for move in legal_moves:
-        scores[move] = determine_score_for_move(move, state, playout_count_per_move, cancelled_event)
+    # Run the playouts in batches and add up the score sums of the finished playouts for each legal move.
+    # Moves are identified by their index in legal_moves, so that no moves need to be hashed or sent to the worker processes.
+    # The sums are stored in lists with the same order as legal_moves.
+    move_count: Final[int] = len(legal_moves)
+    playout_count_sums: Final[list[int]] = [0] * move_count
+    score_sums: Final[list[float]] = [0] * move_count
+    squared_score_sums: Final[list[float]] = [0] * move_count
+    pending_playout_counts: Final[list[int]] = [0] * move_count  # Number of playouts of each move that have been submitted, but have not finished yet.
+    pending_batches: Final[dict[Future[tuple[int, float, float] | None], tuple[int, int]]] = {}  # Move index and playout count of each submitted batch that has not finished yet.
+    batch_size: Final[int] = min(PLAYOUT_BATCH_SIZE, playout_count_per_move)
+    remaining_playout_count: int = move_count * playout_count_per_move
+
+    # First give each move one batch, so that each move has a score before the UCB1 algorithm chooses between them.
+    # If there are no more playouts than that, like for the easiest AI, then the playouts are divided evenly over the moves.
+    # Each batch gets its own random seed from the operating system, otherwise the worker processes could run exactly the same playouts.
+    for move_index in range(move_count):
+        pending_batches[executor.submit(_run_playout_batch_in_worker, state, move_index, batch_size, create_seed())] = move_index, batch_size
+        pending_playout_counts[move_index] += batch_size
+    remaining_playout_count -= move_count * batch_size
+
+    # Each time a batch has finished, add up its score sums and keep the worker processes busy with batches for the moves that UCB1 chooses.
+    while pending_batches:
+        finished_futures, _ = wait(pending_batches, return_when=FIRST_COMPLETED)
+        for future in finished_futures:
+            move_index, playout_count = pending_batches.pop(future)
+            pending_playout_counts[move_index] -= playout_count
+            batch_score_sums: tuple[int, float, float] | None = future.result()
+            if batch_score_sums is not None:  # None means that the playouts have been cancelled.
+                playout_count_sums[move_index] += batch_score_sums[0]
+                score_sums[move_index] += batch_score_sums[1]
+                squared_score_sums[move_index] += batch_score_sums[2]
 
         if cancelled_event.is_set():
+            # Wait until the worker processes have stopped running the submitted batches, so that they do not keep running during the next search.
+            wait(pending_batches)
             return None
 
+        while remaining_playout_count > 0 and len(pending_batches) < PLAYOUT_WORKER_COUNT:
+            move_index: int | None = choose_move_index(playout_count_sums, score_sums, pending_playout_counts)
+            if move_index is None:  # No batch has finished yet.
+                break
+
+            playout_count: int = min(batch_size, remaining_playout_count)
+            pending_batches[executor.submit(_run_playout_batch_in_worker, state, move_index, playout_count, create_seed())] = move_index, playout_count
+            pending_playout_counts[move_index] += playout_count
+            remaining_playout_count -= playout_count
+
+    # Determine score and uncertainty for each legal move, using mean and standard deviation of the scores of its playouts.
+    # The scores and uncertainties are stored in two lists with the same order as legal_moves.
+    scores: Final[list[float]] = []
+    uncertainties: Final[list[float]] = []
+    for sums in zip(playout_count_sums, score_sums, squared_score_sums):
+        score, uncertainty = determine_mean_and_standard_deviation(*sums)
+        scores.append(score)
+        uncertainties.append(uncertainty)
+
     # Print debug output.
-    if __debug__:
-        sorted_scores: Final[list[tuple[float, float]]] = sorted(scores.values(), key=lambda pair: pair[0], reverse=True)
+    if PRINT_SCORES:
+        sorted_scores: Final[list[tuple[float, float]]] = sorted(zip(scores, uncertainties), key=lambda pair: pair[0], reverse=True)
         print("scores: " + ", ".join(f"({score:.1f} +/- {uncertainty:.1f})" for score, uncertainty in sorted_scores))
 
     # Keep only the moves with the best score and choose one of those randomly.
-    best_score: Final[float] = max(score for score, _ in scores.values())
-    best_moves: Final[list[CheckersMove]] = [move for move, (score, _) in scores.items() if isclose(score, best_score, rel_tol=1e-5, abs_tol=1e-5)]
-    return random.choice(best_moves)
+    best_score: Final[float] = max(scores)
+    best_move_indices: Final[list[int]] = [move_index for move_index, score in enumerate(scores) if isclose(score, best_score, rel_tol=1e-5, abs_tol=1e-5)]
+    return legal_moves[random.choice(best_move_indices)]
+
+
+def choose_move_index(playout_counts: list[int], score_sums: list[float], pending_playout_counts: list[int]) -> int | None:
+    """ Return the index of the move that should get the next playouts according to the UCB1 algorithm: the move with the highest upper confidence bound for its score.
+    Return None if none of the moves has a finished playout yet.
+
+    The passed lists contain for each move the number of finished playouts, the sum of their scores and the number of playouts that have been submitted, but have not finished yet.
+    The unfinished playouts count towards the number of playouts of a move, so that the worker processes do not all run playouts for the same move at the same time.
+    Moves without finished playouts are skipped, since their unfinished playouts will give them a score soon.
+
+    The UCB1 algorithm treats the choice of a move as a multi-armed bandit problem and is described on https://en.wikipedia.org/wiki/Multi-armed_bandit
+    This way moves that are clearly worse than the other moves get fewer playouts, so that more playouts are left for the moves that matter.
+    """
+
+    log_total_playout_count: Final[float] = log(sum(playout_counts) + sum(pending_playout_counts))
+    best_move_index: int | None = None
+    best_upper_bound: float = -inf
+    for move_index, (playout_count, score_sum, pending_playout_count) in enumerate(zip(playout_counts, score_sums, pending_playout_counts)):
+        if playout_count <= 0:
+            continue
 
+        upper_bound: float = score_sum / playout_count + UCB1_EXPLORATION_CONSTANT * sqrt(log_total_playout_count / (playout_count + pending_playout_count))
+        if upper_bound > best_upper_bound:
+            best_move_index, best_upper_bound = move_index, upper_bound
 
-def determine_score_for_move(move: CheckersMove, root_state: CheckersState, playout_count: int, cancelled_event: Event) -> tuple[float, float] | None:
-    """ Return a score and uncertainty for the passed move by running the passed number of playouts.
-    Each playout starts with the passed root_state and the passed move.
+    return best_move_index
+
+
+def create_seed() -> int:
+    """ Return a random seed that is derived from the random source of the operating system. """
+
+    return int.from_bytes(os.urandom(8))
+
+
+def _run_playout_batch_in_worker(root_state: CheckersState, move_index: int, playout_count: int, seed: int) -> tuple[int, float, float] | None:
+    """ Return the result of determine_score_sums_for_move() for the legal move at the passed move_index of the passed root_state and the passed playout_count,
+    using a random number generator that is seeded with the passed seed.
+    """
+
+    return determine_score_sums_for_move(root_state.legal_moves[move_index], root_state, playout_count, _worker_cancelled_event, random.Random(seed))
+
+
+def determine_score_sums_for_move(move: CheckersMove, root_state: CheckersState, playout_count: int, cancelled_event: Event,
+                                  rng: random.Random) -> tuple[int, float, float] | None:
+    """ Run the passed number of playouts for the passed move and return a tuple: (playout count, sum of scores, sum of squared scores).
+    Sums can be added up for playouts that were run separately and can be converted to a mean and standard deviation with determine_mean_and_standard_deviation().
+    Each playout starts with the passed root_state and the passed move and uses the passed random number generator (rng) to choose moves.
 
     This function assumes that the passed move is legal for the passed root_state.
+    The passed root_state is changed while the playouts are running, but it is restored before this function returns.
 
     The passed cancelled_event indicates whether the playouts have been cancelled from outside this function by another thread.
     If cancelled_event becomes set, this function will stop as soon as possible and return None.
@@ -72,49 +222,89 @@ def determine_score_for_move(move: CheckersMove, root_state: CheckersState, play
         raise ValueError(f"Number of playouts must be positive, not '{playout_count}'.")
 
     # Run playouts.
-    max_ply_count: Final[int] = root_state.ply_count + MAX_RECURSION_DEPTH
-    playout_start_state: Final[CheckersState] = deepcopy(root_state)
-    playout_start_state.apply(move)
-    playout_results: Final[list[CheckersGameResult | None]] = []
+    # All playouts start from the same state, which is restored after each playout, so that no state needs to be copied.
+    # The scores are added up while the playouts are running, so that no list with results is needed.
+    # The passed move counts towards the maximum recursion depth, so each playout can apply one move less.
+    max_playout_ply_count: int = MAX_RECURSION_DEPTH - 1
+    player: CheckersPlayer = root_state.current_player
+    is_cancelled: Callable[[], bool] = cancelled_event.is_set
+    score_sum: float = 0
+    squared_score_sum: float = 0
+    root_state.push(move)
     for _ in range(playout_count):
-        playout_results.append(run_playout(playout_start_state, max_ply_count, cancelled_event))
+        score: float = determine_score(run_playout(root_state, max_playout_ply_count, cancelled_event, rng), player)
+        score_sum += score
+        squared_score_sum += score * score
 
-        if cancelled_event.is_set():
-            return None
+        if is_cancelled():
+            break
+    root_state.pop()
+
+    if is_cancelled():
+        return None
+
+    return playout_count, score_sum, squared_score_sum
 
-    # Determine score for each playout.
-    scores: Final[list[float]] = [determine_score(result, root_state.current_player) for result in playout_results]
 
-    # Return mean and standard deviation of scores.
-    assert len(scores) >= 1
-    return mean(scores), stdev(scores) if len(scores) >= 2 else 0
+def determine_mean_and_standard_deviation(count: int, value_sum: float, squared_value_sum: float) -> tuple[float, float]:
+    """ Return the mean and the sample standard deviation of values with the passed count, sum of values (value_sum) and sum of squared values (squared_value_sum). """
 
+    if count <= 0:
+        raise ValueError(f"Count must be positive, not '{count}'.")
 
-def run_playout(state: CheckersState, max_ply_count: int, cancelled_event: Event) -> CheckersGameResult | None:
-    """ Apply randomly chosen legal moves to a copy of the passed state until it reaches an end state of the game
+    mean: float = value_sum / count
+    if count < 2:
+        return mean, 0
+
+    # Rounding errors can make the variance slightly negative if all values are (almost) equal.
+    variance: float = max(0.0, (squared_value_sum - value_sum * mean) / (count - 1))
+    return mean, sqrt(variance)
+
+
+def run_playout(state: CheckersState, max_playout_ply_count: int, cancelled_event: Event, rng: random.Random) -> CheckersGameResult | None:
+    """ Apply legal moves that are chosen randomly using the passed random number generator (rng) to the passed state until it reaches an end state of the game
     and return the result of that end state.
-    Return None (no result) if the passed max_ply_count is reached before an end state occurs.
+    Return None (no result) if the passed max_playout_ply_count moves have been applied before an end state occurs.
+
+    The moves are applied with push_unchecked() and reverted with pop() before this function returns, so that the passed state is not changed.
 
     The passed cancelled_event indicates whether the playout has been cancelled from outside this function by another thread.
     If cancelled_event becomes set, this function will stop as soon as possible and return None.
     """
 
-    state = deepcopy(state)
-    while True:
-        # If playout has been cancelled, return None.
-        if cancelled_event.is_set():
-            return None
+    # Look up the method that checks the cancelled event only once, instead of once per check.
+    is_cancelled: Callable[[], bool] = cancelled_event.is_set
 
-        # If an end state has been reached, return result.
-        if result := state.result:
-            return result
+    result: CheckersGameResult | None = None
+    pushed_move_count: int = 0
+    for ply in range(max_playout_ply_count):
+        # If playout has been cancelled, stop (no result).
+        # Checking the cancelled event takes a lock, so only check it once every few plies.
+        if ply % CANCELLED_CHECK_INTERVAL == 0 and is_cancelled():
+            break
 
-        # If max_ply_count has been reached, return None (no result).
-        if state.ply_count >= max_ply_count:
-            return None
+        # Determine the legal moves only once per ply.
+        # The state caches them, so determining the result below does not construct them again.
+        legal_moves: tuple[CheckersMove, ...] = state.legal_moves
+
+        # If an end state has been reached, stop.
+        # Note that having no legal moves is not the only end state: a king-versus-king endgame is a draw, so the result must be checked as well.
+        if result := state.result:
+            break
 
         # Make a random move and repeat.
-        state.apply(random.choice(state.legal_moves))
+        # The move is taken from the legal moves of the state, so it does not need to be checked again.
+        state.push_unchecked(legal_moves[rng.randrange(len(legal_moves))])
+        pushed_move_count += 1
+
+    else:  # If max_playout_ply_count has been reached, there is only a result if the game ended with the last move.
+        result = state.result
+
+    # Revert the state to how it was at the start of the playout.
+    for _ in range(pushed_move_count):
+        state.pop()
+
+    return result
 
 
 def determine_score(result: CheckersGameResult | None, player: CheckersPlayer) -> float:
@@ -123,7 +313,7 @@ def determine_score(result: CheckersGameResult | None, player: CheckersPlayer) -
     if result is None:  # Maximum recursion depth was reached and the game was not finished yet.
         return 0.5
 
-    game_duration_score: Final[float] = min(0.001 * result.total_ply_count, 0.2)
+    game_duration_score: float = min(0.001 * result.total_ply_count, 0.2)
     if result.winner is None:  # Game ended in a draw.
         # The algorithm should postpone a draw as long as possible, because an opportunity to win the game might still come along.
         # Therefore add game duration score.
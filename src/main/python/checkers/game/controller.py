@@ -18,7 +18,7 @@ from checkers.gui.world import CheckersBoardGeometry, CheckersPieceGeometry
 from checkers.model.move_selectors import CheckersMoveSelector
 from checkers.model.rules import BOARD_SHAPE
 from checkers.model.state import CheckersState
-from checkers.model.util import CheckersMove, CheckersPlayer, Index2D
+from checkers.model.util import CheckersBoardView, CheckersMove, CheckersPlayer, Index2D
 
 
 # Store move selector type for each player.
@@ -54,23 +54,37 @@ class CheckersController:
         # Adjust square size, so that the board fits the display, including a border that is at least one square wide on all sides.
         square_size: Final[int] = max(1, min(display_width // (column_count + 2), display_height // (row_count + 2)))  # In pixels.
         self._board_geometry: Final[CheckersBoardGeometry] = CheckersBoardGeometry(board_center, square_size, row_count, column_count)
-        self._piece_geometries: Final[list[CheckersPieceGeometry]] = []
+        self._piece_geometries: Final[dict[Index2D: CheckersPieceGeometry]] = {}  # Store the geometry of each piece by its square.
 
         self._alive: bool = True
 
     def _start_new_game(self):
         self._state.start_new_game()
-        self._update_piece_geometries()
+        self._create_piece_geometries()
 
     def _apply_move(self, selected_move: CheckersMove):
         self._state.apply(selected_move)
-        self._update_piece_geometries()
+        self._update_piece_geometries(selected_move)
 
-    def _update_piece_geometries(self):
+    def _create_piece_geometries(self):
         """ For each piece on the board in the current state, create a geometry that can be rendered. """
 
         self._piece_geometries.clear()
-        self._piece_geometries.extend(CheckersPieceGeometry(piece, self._board_geometry.convert_square_to_world_coordinates(square)) for square, piece in self._state.board)
+        self._piece_geometries.update((square, CheckersPieceGeometry(piece, self._board_geometry.convert_square_to_world_coordinates(square)))
+                                      for square, piece in self._state.board_view)
+
+    def _update_piece_geometries(self, applied_move: CheckersMove):
+        """ Update the geometries of the pieces that have been moved, crowned or captured by the passed applied_move, which has just been applied to the current state.
+
+        Only the squares that the moving piece has passed can have changed, so the geometries of the other pieces are kept.
+        """
+
+        board: Final[CheckersBoardView] = self._state.board_view
+        for square in determine_passed_squares(applied_move):
+            if piece := board[square]:
+                self._piece_geometries[square] = CheckersPieceGeometry(piece, self._board_geometry.convert_square_to_world_coordinates(square))
+            else:
+                self._piece_geometries.pop(square, None)
 
     def _start_move_selection(self):
         self._current_move_selector = self._move_selectors[self._state.current_player]
@@ -101,7 +115,7 @@ class CheckersController:
             self._update()
 
             # Render game.
-            self._view.render(self._board_geometry, self._piece_geometries, self._current_move_selector)
+            self._view.render(self._board_geometry, self._piece_geometries.values(), self._current_move_selector)
 
             # Wait until next frame.
             clock.tick(FRAMES_PER_SECOND)
@@ -129,6 +143,10 @@ class CheckersController:
                 case pygame.MOUSEBUTTONDOWN:
                     self._handle_mouse_event(event)
 
+                case pygame.VIDEOEXPOSE | pygame.WINDOWEXPOSED:
+                    # The contents of the window have been lost, for example because the window was hidden, so everything must be drawn again.
+                    self._view.invalidate()
+
                 case _:
                     pass
 
@@ -150,3 +168,18 @@ class CheckersController:
 
             case _:
                 pass
+
+
+def determine_passed_squares(move: CheckersMove) -> list[Index2D]:
+    """ Return the squares that the moving piece of the passed move passes, including its visited squares and the squares of the pieces that it captures. """
+
+    passed_squares: Final[list[Index2D]] = [move.origin]
+    for start_square, end_square in zip(move.visited_squares[:-1], move.visited_squares[1:]):
+        # Add all squares on the diagonal from the start square (exclusive) to the end square (inclusive).
+        direction: Index2D = Index2D.sign(end_square - start_square)
+        square: Index2D = start_square
+        while square != end_square:
+            square += direction
+            passed_squares.append(square)
+
+    return passed_squares
@@ -3,12 +3,12 @@
 # ------------------------------------------------------------------------------
 
 """ This module contains a mapping between user choices and implementations of checkers move selectors. """
-from asyncio import Event
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from enum import auto, Enum, unique
+from multiprocessing.synchronize import Event
 from typing import Final, override
 
-from checkers.ai.solver import pure_monte_carlo_game_search
+from checkers.ai.solver import create_cancelled_event, create_playout_executor, pure_monte_carlo_game_search
 from checkers.gui.input import UserCheckersMoveSelector
 from checkers.model.move_selectors import CheckersMoveSelector, RandomCheckersMoveSelector
 from checkers.model.state import CheckersState
@@ -18,25 +18,33 @@ from checkers.model.util import CheckersMove
 class AICheckersMoveSelector(CheckersMoveSelector):
     """ Select the best legal move for a given state of a checkers game. """
 
-    __slots__ = ('_future_selected_move', '_executor', '_cancelled_event', '_playout_count_per_move')
+    __slots__ = ('_future_selected_move', '_executor', '_cancelled_event', '_playout_executor', '_playout_count_per_move')
 
     def __init__(self, playout_count_per_move: int):
         """ Create an empty AI checkers move selector with the passed number of playouts per move. """
 
+        # Check the passed arguments before any worker thread or worker process is started.
+        if playout_count_per_move <= 0:
+            raise ValueError(f"Number of playouts per move must be positive, not '{playout_count_per_move}'.")
+
         self._future_selected_move: Future[CheckersMove | None] | None = None  # Future that holds the selected move after the selection procedure has finished.
 
         # Create a worker thread that is used to run the selection procedure.
         self._executor: Final[ThreadPoolExecutor] = ThreadPoolExecutor(max_workers=1)
-        self._cancelled_event: Final[Event] = Event()  # Event to signal to a running thread that the selection procedure has been cancelled.
-
-        if playout_count_per_move <= 0:
-            raise ValueError(f"Number of playouts per move must be positive, not '{playout_count_per_move}'.")
+        self._cancelled_event: Final[Event] = create_cancelled_event()  # Event to signal to a running thread and its worker processes that the selection procedure has been cancelled.
+        # Create worker processes that are used to run the playouts of the selection procedure in parallel.
+        self._playout_executor: Final[ProcessPoolExecutor] = create_playout_executor(self._cancelled_event)
 
         self._playout_count_per_move: Final[int] = playout_count_per_move
 
     def __del__(self):
+        # If __init__() raised an exception before the worker processes were created, there is nothing to stop.
+        if not hasattr(self, '_playout_executor'):
+            return
+
         self.reset()
         self._executor.shutdown()
+        self._playout_executor.shutdown()
 
     @override
     def reset(self):
@@ -54,7 +62,8 @@ class AICheckersMoveSelector(CheckersMoveSelector):
         self.reset()
 
         # Run the selection procedure in a separate thread so that it does not block the main thread.
-        self._future_selected_move = self._executor.submit(pure_monte_carlo_game_search, state, self._playout_count_per_move, self._cancelled_event)
+        self._future_selected_move = self._executor.submit(pure_monte_carlo_game_search, state, self._playout_count_per_move,
+                                                           self._playout_executor, self._cancelled_event)
 
     @override
     def selected_move(self) -> CheckersMove | None:
@@ -6,7 +6,7 @@
 from math import pi
 from typing import Final
 
-from pygame import draw, Rect, Surface, Vector2
+from pygame import draw, Rect, SRCALPHA, Surface, Vector2
 
 
 def draw_square(canvas: Surface, center: Vector2, size: int, color: tuple[int, int, int, int], line_thickness: int):
@@ -38,6 +38,39 @@ def draw_checkers_board(canvas: Surface, center: Vector2, row_count: int, column
             fill_square(canvas, square_center, square_size, square_color)
 
 
+def create_checkers_board_image(row_count: int, column_count: int, square_size: int,
+                                light_square_color: tuple[int, int, int, int], dark_square_color: tuple[int, int, int, int]) -> Surface:
+    """ Create and return an image of a checkers board with the passed properties, which can be drawn with draw_image().
+
+    Drawing a checkers board takes one draw call per square, therefore it is faster to draw the board once to an image and draw that image every frame.
+    """
+
+    image: Final[Surface] = Surface((column_count * square_size, row_count * square_size))
+    draw_checkers_board(image, Vector2(image.get_width() // 2, image.get_height() // 2), row_count, column_count, square_size, light_square_color, dark_square_color)
+    return image
+
+
+def draw_image(canvas: Surface, center: Vector2, image: Surface):
+    """ Draw the passed image with the passed center (display coordinates in pixels) on the passed canvas. """
+
+    upper_left_corner: Final[Vector2] = center - Vector2(image.get_size()) // 2
+    canvas.blit(image, upper_left_corner)
+
+
+def create_checkers_piece_image(piece_width: int, two_layers: bool,
+                                fill_color: tuple[int, int, int, int], line_color: tuple[int, int, int, int], line_thickness: int) -> Surface:
+    """ Create and return a transparent image of a checkers piece with the passed properties, which can be drawn with draw_image().
+    The center of the image corresponds to the center of the piece.
+
+    Drawing a checkers piece takes several draw calls, therefore it is faster to draw each kind of piece once to an image and draw that image every frame.
+    """
+
+    # The image is large enough to fit the piece, including the height of a piece with two layers.
+    image: Final[Surface] = Surface((2 * piece_width, 2 * piece_width), SRCALPHA)
+    draw_checkers_piece(image, Vector2(piece_width, piece_width), piece_width, two_layers, fill_color, line_color, line_thickness)
+    return image
+
+
 def draw_checkers_piece(canvas: Surface, piece_center: Vector2, piece_width: int, two_layers: bool,
                         fill_color: tuple[int, int, int, int], line_color: tuple[int, int, int, int], line_thickness: int):
     """ Draw a checkers piece with the passed properties and passed center (display coordinates in pixels) on the passed canvas. """
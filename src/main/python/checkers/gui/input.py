@@ -21,24 +21,39 @@ class UserCheckersMoveSelector(CheckersMoveSelector):
     When the squares that have been selected together form a complete move, this move is stored and can be retrieved by calling selected_move().
     """
 
-    __slots__ = ('_selectable_moves', '_selectable_squares', '_selected_squares', '_selected_move')
+    __slots__ = ('_prefix_trie', '_current_trie_node', '_selectable_squares', '_selected_squares', '_selected_move', '_version')
 
     def __init__(self):
         """ Create an empty user checkers move selector. """
 
         # Input for the selection procedure.
-        self._selectable_moves: tuple[CheckersMove, ...] = tuple()  # Complete moves that can be selected.
+        # The complete moves that can be selected are stored in a prefix trie: a nested dictionary that maps each first visited square of a move
+        # to a dictionary that maps each second visited square to a dictionary, and so on, until the last visited square, which maps to the move itself.
+        self._prefix_trie: dict[Index2D: dict | CheckersMove] = {}
 
         # Temporary variables to keep track of the selection procedure.
-        self._selectable_squares: Final[set[Index2D]] = set()  # Squares that can be selected as the next step in the selection procedure.
+        self._current_trie_node: dict[Index2D: dict | CheckersMove] = self._prefix_trie  # Node of the prefix trie that corresponds to the squares that have been selected so far.
+        # Squares that can be selected as the next step in the selection procedure.
+        # This set is immutable and is replaced on each update, so that it can be returned without making a copy.
+        self._selectable_squares: frozenset[Index2D] = frozenset()
         self._selected_squares: Final[list[Index2D]] = []  # Squares that have been selected so far, in the order of selection, which together form a partial move.
 
         # Result of the selection procedure.
         self._selected_move: CheckersMove | None = None
 
+        self._version: int = 0  # Incremented each time the selectable squares or the selected squares change.
+
+    @property
+    def version(self) -> int:
+        """ Return a number that changes each time the selectable squares or the selected squares change.
+        This can be used to avoid processing the same selectable squares and selected squares more than once.
+        """
+
+        return self._version
+
     @property
     def selectable_squares(self) -> frozenset[Index2D]:
-        return frozenset(self._selectable_squares)
+        return self._selectable_squares
 
     @property
     def selected_squares(self) -> tuple[Index2D, ...]:
@@ -46,16 +61,19 @@ class UserCheckersMoveSelector(CheckersMoveSelector):
 
     @override
     def reset(self):
-        self._selectable_moves = tuple()
-        self._selectable_squares.clear()
+        self._prefix_trie = {}
+        self._current_trie_node = self._prefix_trie
+        self._selectable_squares = frozenset()
         self._selected_squares.clear()
         self._selected_move = None
+        self._version += 1
 
     @override
     def start(self, state: CheckersState):
         self.reset()
 
-        self._selectable_moves = state.legal_moves
+        self._prefix_trie = build_prefix_trie(state.legal_moves)
+        self._current_trie_node = self._prefix_trie
         self._update_selectable_squares()
 
     def select(self, square: Index2D):
@@ -67,54 +85,47 @@ class UserCheckersMoveSelector(CheckersMoveSelector):
 
         if square in self._selectable_squares:
             # Continue the selection procedure.
+            next_trie_node: Final[dict[Index2D: dict | CheckersMove] | CheckersMove] = self._current_trie_node[square]
+            if isinstance(next_trie_node, CheckersMove):
+                # End selection procedure, since a complete move has been selected.
+                self._selected_move = next_trie_node
+                self._selected_squares.clear()
+                self._selectable_squares = frozenset()
+                self._version += 1
+                return
+
             self._selected_squares.append(square)
+            self._current_trie_node = next_trie_node
         else:
             # Restart the selection procedure.
             self._selected_squares.clear()
+            self._current_trie_node = self._prefix_trie
             self._selected_move = None
 
         self._update_selectable_squares()
 
     def _update_selectable_squares(self):
-        """ Determine which squares can be selected, using the selectable moves and the squares that have been selected already. """
-
-        # If selection procedure has been completed, do nothing.
-        if self._selected_move:
-            return
+        """ Determine which squares can be selected, using the node of the prefix trie that corresponds to the squares that have been selected already. """
 
-        self._selectable_squares.clear()
-        if not self._selectable_moves:
-            return
-
-        # Find all moves that start with the partial move that has been selected so far.
-        matching_moves: Final[list[CheckersMove]] = []
-        selected_partial_move_length: Final[int] = len(self._selected_squares)
-        for move in self._selectable_moves:
-            if len(move) < selected_partial_move_length:
-                continue
-
-            # Compare start of move with selected squares.
-            for n in range(selected_partial_move_length):
-                if move.visited_squares[n] != self._selected_squares[n]:
-                    break
-            else:  # If start of move matches the partial move that has been selected so far.
-                matching_moves.append(move)
-        assert len(matching_moves) >= 1
-
-        # Check if a complete move has been selected.
-        for matching_move in matching_moves:
-            if len(matching_move) == selected_partial_move_length:
-                assert len(matching_moves) == 1
-
-                # End selection procedure.
-                self._selected_move = matching_move
-                self._selected_squares.clear()
-                return
-
-        # For each matching move, mark the next square as selectable.
-        for matching_move in matching_moves:
-            self._selectable_squares.add(matching_move.visited_squares[selected_partial_move_length])
+        # The next visited squares of all moves that start with the partial move that has been selected so far are selectable.
+        self._selectable_squares = frozenset(self._current_trie_node)
+        self._version += 1
 
     @override
     def selected_move(self) -> CheckersMove | None:
         return self._selected_move
+
+
+def build_prefix_trie(moves: tuple[CheckersMove, ...]) -> dict[Index2D: dict | CheckersMove]:
+    """ Return a prefix trie that contains the passed moves, see UserCheckersMoveSelector. """
+
+    prefix_trie: Final[dict[Index2D: dict | CheckersMove]] = {}
+    for move in moves:
+        # Descend the prefix trie along the visited squares of the move, adding nodes where needed.
+        node: dict[Index2D: dict | CheckersMove] = prefix_trie
+        for square in move.visited_squares[:-1]:
+            node = node.setdefault(square, {})
+        assert move.destination not in node  # No move can be the start of another move.
+        node[move.destination] = move
+
+    return prefix_trie
@@ -4,12 +4,12 @@
 
 """ This module contains code that renders a checkers game to the screen. """
 from math import floor
-from typing import Collection, Final
+from typing import Collection, Final, TypeAlias
 
 import pygame.display as window
-from pygame import Surface, Vector2
+from pygame import Rect, Surface, Vector2
 
-from checkers.gui.graphics import draw_checkers_board, draw_checkers_piece, draw_path, draw_square
+from checkers.gui.graphics import create_checkers_board_image, create_checkers_piece_image, draw_image, draw_path, draw_square
 from checkers.gui.input import UserCheckersMoveSelector
 from checkers.gui.world import CheckersBoardGeometry, CheckersPieceGeometry
 from checkers.model.move_selectors import CheckersMoveSelector
@@ -30,6 +30,10 @@ DARK_PIECE_FILL_COLOR: Final[tuple[int, int, int, int]] = (0, 0, 0, 255)
 DARK_PIECE_LINE_COLOR: Final[tuple[int, int, int, int]] = (96, 96, 96, 255)  # Normal mode.
 # DARK_PIECE_LINE_COLOR: Final[tuple[int, int, int, int]] = (128, 128, 128, 255)  # High contrast mode.
 PIECE_LINE_THICKNESS: Final[int] = 1  # In pixels.
+PIECE_COLORS: Final[dict[CheckersPlayer: tuple[tuple[int, int, int, int], tuple[int, int, int, int]]]] = {
+    CheckersPlayer.LIGHT: (LIGHT_PIECE_FILL_COLOR, LIGHT_PIECE_LINE_COLOR),
+    CheckersPlayer.DARK: (DARK_PIECE_FILL_COLOR, DARK_PIECE_LINE_COLOR)
+}
 
 BOX_COLOR: Final[tuple[int, int, int, int]] = (0, 192, 0, 255)
 BOX_LINE_THICKNESS: Final[int] = 3  # In pixels.
@@ -37,11 +41,14 @@ BOX_LINE_THICKNESS: Final[int] = 3  # In pixels.
 PATH_COLOR: Final[tuple[int, int, int, int]] = (0, 192, 0, 255)
 PATH_LINE_THICKNESS: Final[int] = 4  # In pixels.
 
+# An item that is drawn on the screen: a tuple that starts with the kind of item, followed by everything that is needed to draw it, see CheckersView._draw_item().
+DrawnItem: TypeAlias = tuple
+
 
 class CheckersView:
     """ Create a window and use that to render a checkers game to the screen. """
 
-    __slots__ = ('_display_width', '_display_height', '_canvas')
+    __slots__ = ('_display_width', '_display_height', '_half_display_width', '_half_display_height', '_canvas', '_canvas_rect', '_board_image', '_board_image_key', '_piece_images', '_markings', '_markings_key', '_drawn_items')
 
     def __init__(self, display_width: int, display_height: int):
         """ Create a window with the passed display_width (in pixels) and display_height (in pixels). """
@@ -54,54 +61,203 @@ class CheckersView:
         # Create window.
         self._display_width: Final[int] = display_width  # In pixels.
         self._display_height: Final[int] = display_height  # In pixels.
+        self._half_display_width: Final[float] = 0.5 * display_width  # In pixels.
+        self._half_display_height: Final[float] = 0.5 * display_height  # In pixels.
         window.set_caption("International Checkers")
         self._canvas: Final[Surface] = window.set_mode(size=(self._display_width, self._display_height))
+        self._canvas_rect: Final[Rect] = self._canvas.get_rect()  # Visible area of the canvas (display coordinates in pixels).
+
+        # Cache the image of the board, since the board only changes if its geometry changes.
+        self._board_image: Surface | None = None
+        self._board_image_key: tuple[int, int, int] | None = None  # Number of rows, number of columns and square size of the board in the cached image.
+
+        # Cache an image for each kind of piece, since all pieces of the same kind look the same.
+        self._piece_images: Final[dict[tuple[CheckersPlayer, CheckersPieceType, int]: Surface]] = {}  # Images by owner, type and piece width.
+
+        # Cache the display coordinates of the markings, since they only change if the user selects a square.
+        self._markings: tuple[tuple[tuple[int, int], ...], tuple[tuple[int, int], ...]] = (), ()  # Centers of the selected squares and centers of the selectable squares.
+        self._markings_key: tuple | None = None  # Move selector, its version and the geometry of the board for the cached markings.
+
+        # Keep track of the items that are on the screen, so that only the areas that change need to be drawn again.
+        self._drawn_items: dict[DrawnItem, Rect] | None = None  # None means that nothing has been drawn yet.
+
+    def invalidate(self):
+        """ Make the next call to render() draw and update the whole screen, for example after (part of) the window has been hidden and shown again. """
+
+        self._drawn_items = None
 
     def render(self, board: CheckersBoardGeometry, pieces: Collection[CheckersPieceGeometry], move_selector: CheckersMoveSelector | None):
-        """ Render the passed board, the passed pieces and markings for the passed move_selector to the screen. """
+        """ Render the passed board, the passed pieces and markings for the passed move_selector to the screen.
+
+        Only the areas of the screen where something has changed since the previous call are drawn again and updated.
+        """
+
+        # Determine which areas of the screen have changed, by comparing the items to draw with the items that were drawn for the previous frame.
+        drawn_items: Final[dict[DrawnItem, Rect]] = self._determine_drawn_items(board, pieces, move_selector)
+        if self._drawn_items is None:  # If nothing has been drawn yet, draw everything.
+            dirty_rects: list[Rect] = [self._canvas_rect]
+        else:
+            # Redraw the areas of the items that are gone and the areas of the items that are new.
+            dirty_rects: list[Rect] = ([rect for item, rect in self._drawn_items.items() if item not in drawn_items]
+                                       + [rect for item, rect in drawn_items.items() if item not in self._drawn_items])
+        self._drawn_items = drawn_items
+        if not dirty_rects:
+            return
 
-        # Draw off-screen image.
-        self._canvas.fill(BACKGROUND_COLOR)
-        self._draw_checkers_game(board, pieces, move_selector)
+        # Draw off-screen image, only within the changed areas.
+        for dirty_rect in dirty_rects:
+            self._canvas.set_clip(dirty_rect)
+            self._canvas.fill(BACKGROUND_COLOR)
+            self._draw_items([item for item, rect in drawn_items.items() if rect.colliderect(dirty_rect)])
+        self._canvas.set_clip(None)
 
-        # Update screen.
-        window.flip()
+        # Update only the changed areas of the screen.
+        window.update(dirty_rects)
 
-    def _draw_checkers_game(self, board: CheckersBoardGeometry, pieces: Collection[CheckersPieceGeometry], move_selector: CheckersMoveSelector | None):
-        """ Draw the passed board, the passed pieces and markings for the passed move_selector. """
+    def _determine_drawn_items(self, board: CheckersBoardGeometry, pieces: Collection[CheckersPieceGeometry],
+                               move_selector: CheckersMoveSelector | None) -> dict[DrawnItem, Rect]:
+        """ Determine the items to draw for the passed board, the passed pieces and markings for the passed move_selector, in the order in which they must be drawn.
+        Return a dictionary that maps each item to the area of the screen that it covers (display coordinates in pixels).
 
-        # Draw board.
-        draw_checkers_board(self._canvas, self.convert_world_to_display_coordinates(board.center),
-                            board.row_count, board.column_count, board.square_size, LIGHT_SQUARE_COLOR, DARK_SQUARE_COLOR)
+        Each item is a tuple that starts with the kind of item, followed by everything that is needed to draw it, see _draw_item().
+        Items that look the same are equal, so that items that do not change from one frame to the next do not need to be drawn again.
+        Pieces and boxes that lie completely outside the canvas are left out, since they would not be visible anyway.
+        """
 
-        # Draw pieces.
-        piece_width: Final[int] = 3 * board.square_size // 4  # In pixels.
+        drawn_items: Final[dict[DrawnItem, Rect]] = {}
+        square_size: Final[int] = board.square_size  # In pixels.
+
+        # Add board.
+        board_center_x, board_center_y = self._convert_world_to_display_position(board.center)
+        drawn_items[("board", (board_center_x, board_center_y), board.row_count, board.column_count, square_size)] = Rect(
+            board_center_x - board.width // 2, board_center_y - board.height // 2, board.width, board.height)
+
+        # Add pieces.
+        # A piece fits within its square, but the area is a bit larger to be safe from rounding errors.
+        piece_width: Final[int] = 3 * square_size // 4  # In pixels.
         for piece in pieces:
-            fill_color, line_color = get_checkers_piece_colors(piece.owner)
-            draw_checkers_piece(self._canvas, self.convert_world_to_display_coordinates(piece.center), piece_width,
-                                piece.type is CheckersPieceType.KING, fill_color, line_color, PIECE_LINE_THICKNESS)
+            piece_center_x, piece_center_y = self._convert_world_to_display_position(piece.center)
+            piece_rect: Rect = Rect(piece_center_x - square_size // 2 - 1, piece_center_y - square_size // 2 - 1, square_size + 2, square_size + 2)
+            if self._canvas_rect.colliderect(piece_rect):
+                drawn_items[("piece", piece.owner, piece.type, (piece_center_x, piece_center_y), piece_width)] = piece_rect
 
-        # Draw markings.
+        # Add markings.
         if isinstance(move_selector, UserCheckersMoveSelector):
-            # Draw a path along the selected squares to indicate the selected partial move.
-            waypoints: Final[tuple[Vector2, ...]] = tuple(self.convert_world_to_display_coordinates(board.convert_square_to_world_coordinates(square))
-                                                          for square in move_selector.selected_squares)
-            draw_path(self._canvas, waypoints, 2 * PATH_LINE_THICKNESS, PATH_COLOR, PATH_LINE_THICKNESS)
+            waypoints, selectable_square_centers = self._get_markings(board, move_selector)
+
+            # Add a path along the selected squares to indicate the selected partial move.
+            if waypoints:
+                margin: Final[int] = 2 * PATH_LINE_THICKNESS + PATH_LINE_THICKNESS  # Waypoint radius plus line thickness.
+                left: Final[int] = min(x for x, _ in waypoints) - margin
+                top: Final[int] = min(y for _, y in waypoints) - margin
+                drawn_items[("path", waypoints)] = Rect(left, top, max(x for x, _ in waypoints) + margin - left + 1, max(y for _, y in waypoints) + margin - top + 1)
+
+            # Add boxes to indicate the selectable squares.
+            for square_center_x, square_center_y in selectable_square_centers:
+                box_rect: Rect = Rect(square_center_x - square_size // 2, square_center_y - square_size // 2, square_size, square_size)
+                if self._canvas_rect.colliderect(box_rect):
+                    drawn_items[("box", (square_center_x, square_center_y), square_size)] = box_rect
+
+        return drawn_items
+
+    def _draw_items(self, items: list[DrawnItem]):
+        """ Draw the passed items, which have been created by _determine_drawn_items(), in order.
+        Consecutive pieces are drawn together with a single call, since they are all drawn as images.
+        """
+
+        piece_blits: Final[list[tuple[Surface, tuple[int, int]]]] = []  # Image and upper left corner (display coordinates in pixels) for each piece.
+        for item in items:
+            if item[0] == "piece":
+                _, owner, piece_type, (center_x, center_y), piece_width = item
+                piece_image: Surface = self._get_piece_image(owner, piece_type, piece_width)
+                piece_blits.append((piece_image, (center_x - piece_image.get_width() // 2, center_y - piece_image.get_height() // 2)))
+                continue
+
+            # Draw the pieces that come before this item.
+            if piece_blits:
+                self._canvas.blits(piece_blits, doreturn=False)
+                piece_blits.clear()
 
-            # Draw boxes to indicate the selectable squares.
-            for square in move_selector.selectable_squares:
-                square_center: Vector2 = self.convert_world_to_display_coordinates(board.convert_square_to_world_coordinates(square))
-                draw_square(self._canvas, square_center, board.square_size, BOX_COLOR, BOX_LINE_THICKNESS)
+            self._draw_item(item)
+
+        if piece_blits:
+            self._canvas.blits(piece_blits, doreturn=False)
+
+    def _draw_item(self, item: DrawnItem):
+        """ Draw the passed item, which has been created by _determine_drawn_items(). """
+
+        match item[0]:
+            case "board":
+                _, center, row_count, column_count, square_size = item
+                draw_image(self._canvas, Vector2(center), self._get_board_image(row_count, column_count, square_size))
+            case "piece":
+                _, owner, piece_type, center, piece_width = item
+                draw_image(self._canvas, Vector2(center), self._get_piece_image(owner, piece_type, piece_width))
+            case "path":
+                _, waypoints = item
+                draw_path(self._canvas, tuple(Vector2(waypoint) for waypoint in waypoints), 2 * PATH_LINE_THICKNESS, PATH_COLOR, PATH_LINE_THICKNESS)
+            case "box":
+                _, center, square_size = item
+                draw_square(self._canvas, Vector2(center), square_size, BOX_COLOR, BOX_LINE_THICKNESS)
+            case _:
+                raise ValueError(f"Invalid item '{item}'.")
+
+    def _get_board_image(self, row_count: int, column_count: int, square_size: int) -> Surface:
+        """ Return an image of a board with the passed row_count, column_count and square_size (in pixels).
+        The image is created only once and is created again only if the geometry of the board changes.
+        """
+
+        board_image_key: Final[tuple[int, int, int]] = (row_count, column_count, square_size)
+        if self._board_image is None or self._board_image_key != board_image_key:
+            # Convert the image to the pixel format of the screen once, otherwise it would be converted each time it is drawn.
+            self._board_image = create_checkers_board_image(row_count, column_count, square_size, LIGHT_SQUARE_COLOR, DARK_SQUARE_COLOR).convert(self._canvas)
+            self._board_image_key = board_image_key
+
+        return self._board_image
+
+    def _get_piece_image(self, owner: CheckersPlayer, piece_type: CheckersPieceType, piece_width: int) -> Surface:
+        """ Return an image of a piece with the passed owner, piece_type and piece_width (in pixels). The image is created only once for each kind of piece. """
+
+        piece_image_key: Final[tuple[CheckersPlayer, CheckersPieceType, int]] = (owner, piece_type, piece_width)
+        if (piece_image := self._piece_images.get(piece_image_key)) is None:
+            fill_color, line_color = get_checkers_piece_colors(owner)
+            # Convert the image to the pixel format of the screen once, otherwise it would be converted each time it is drawn.
+            piece_image = create_checkers_piece_image(piece_width, piece_type is CheckersPieceType.KING, fill_color, line_color, PIECE_LINE_THICKNESS).convert_alpha(self._canvas)
+            self._piece_images[piece_image_key] = piece_image
+
+        return piece_image
+
+    def _get_markings(self, board: CheckersBoardGeometry,
+                      move_selector: UserCheckersMoveSelector) -> tuple[tuple[tuple[int, int], ...], tuple[tuple[int, int], ...]]:
+        """ Return the centers (display coordinates in pixels) of the selected squares and the centers of the selectable squares of the passed move_selector
+        on the passed board as a tuple: (selected square centers, selectable square centers).
+        The centers are determined again only if the selection of the move_selector or the geometry of the board changes.
+        """
+
+        markings_key: Final[tuple] = (move_selector, move_selector.version, tuple(board.center), board.square_size, board.row_count, board.column_count)
+        if self._markings_key != markings_key:
+            self._markings = (tuple(self._convert_world_to_display_position(board.convert_square_to_world_coordinates(square))
+                                    for square in move_selector.selected_squares),
+                              tuple(self._convert_world_to_display_position(board.convert_square_to_world_coordinates(square))
+                                    for square in move_selector.selectable_squares))
+            self._markings_key = markings_key
+
+        return self._markings
 
     def convert_world_to_display_coordinates(self, world_coordinates: Vector2) -> Vector2:
         """ Return the display coordinates (in pixels) that correspond to the passed world_coordinates (in pixels). """
 
-        # Convert world coordinates to display coordinates.
-        display_coordinates: Vector2 = world_coordinates + 0.5 * Vector2(self._display_width, self._display_height)
-        # Invert y coordinate.
-        display_coordinates.y = self._display_height - display_coordinates.y
-        # Round display coordinates to integers.
-        return Vector2(floor(display_coordinates.x), floor(display_coordinates.y))
+        return Vector2(self._convert_world_to_display_position(world_coordinates))
+
+    def _convert_world_to_display_position(self, world_coordinates: Vector2) -> tuple[int, int]:
+        """ Return the display coordinates (in pixels) that correspond to the passed world_coordinates (in pixels) as a tuple: (x, y).
+
+        This method does the same as convert_world_to_display_coordinates(), but it uses scalar arithmetic and does not create any vectors,
+        since it is called many times per frame.
+        """
+
+        # Convert world coordinates to display coordinates, invert y coordinate and round display coordinates to integers.
+        return floor(world_coordinates.x + self._half_display_width), floor(self._display_height - (world_coordinates.y + self._half_display_height))
 
     def convert_display_to_world_coordinates(self, display_coordinates: Vector2) -> Vector2:
         """ Return the world coordinates (in pixels) that correspond to the passed display_coordinates (in pixels). """
@@ -117,10 +273,7 @@ class CheckersView:
 def get_checkers_piece_colors(player: CheckersPlayer) -> tuple[tuple[int, int, int, int], tuple[int, int, int, int]]:
     """ Return the colors of the pieces of the passed player as a tuple: (fill color, line color). """
 
-    match player:
-        case CheckersPlayer.LIGHT:
-            return LIGHT_PIECE_FILL_COLOR, LIGHT_PIECE_LINE_COLOR
-        case CheckersPlayer.DARK:
-            return DARK_PIECE_FILL_COLOR, DARK_PIECE_LINE_COLOR
-        case _:
-            raise ValueError(f"Invalid {CheckersPlayer.__name__} '{player}'.")
+    try:
+        return PIECE_COLORS[player]
+    except KeyError:
+        raise ValueError(f"Invalid {CheckersPlayer.__name__} '{player}'.") from None
@@ -65,7 +65,7 @@ class CheckersBoardGeometry:
         # Convert board coordinates to square coordinates.
         square_coordinates: Final[Vector2] = (board_coordinates + 0.5 * Vector2(self.width, self.height)) / self.square_size  # In squares.
         # Round square coordinates to integers.
-        return Index2D(floor(square_coordinates.x), floor(square_coordinates.y))  # Integer indices.
+        return Index2D.of(floor(square_coordinates.x), floor(square_coordinates.y))  # Integer indices.
 
     def __contains__(self, world_coordinates: Vector2) -> bool:
         """ Return True if the passed world_coordinates (in pixels) are within the bounding box of this checkers board geometry. Otherwise, return False.
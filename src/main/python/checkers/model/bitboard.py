@@ -0,0 +1,85 @@
+# ------------------------------------------------------------------------------
+#  Copyright (c) 2024 A.C. Kockx, All Rights Reserved.
+# ------------------------------------------------------------------------------
+
+""" This module contains functions to work with bitboards.
+
+A bitboard is an integer that stores a set of squares of a checkers board: bit number y * (column_count + 1) + x is set if the square with column index x
+and row index y is part of the set. Each row occupies one bit more than there are columns, so that shifting a bitboard one step in a diagonal direction
+never wraps a square from one edge of the board to the opposite edge, but moves it into the unused bit at the end of a row instead.
+"""
+from functools import cache
+from typing import Final, Iterator
+
+DIAGONAL_DELTAS: Final[tuple[tuple[int, int], ...]] = ((-1, 1), (1, 1), (1, -1), (-1, -1))  # Column and row steps (delta_x, delta_y) of the diagonal directions.
+
+
+def get_bit_index(x: int, y: int, column_count: int) -> int:
+    """ Return the number of the bit that corresponds to the square with the passed column index x and row index y on a board with the passed column_count. """
+
+    return y * (column_count + 1) + x
+
+
+@cache
+def get_square_bitboard(row_count: int, column_count: int) -> int:
+    """ Return a bitboard that contains all squares of a board with the passed row_count and column_count. """
+
+    row_bitboard: int = (1 << column_count) - 1
+    bitboard: int = 0
+    for y in range(row_count):
+        bitboard |= row_bitboard << get_bit_index(0, y, column_count)
+
+    return bitboard
+
+
+@cache
+def get_diagonal_rays(row_count: int, column_count: int) -> tuple[tuple[tuple[int, ...], ...], ...]:
+    """ Return a table with the diagonal rays of each square of a board with the passed row_count and column_count, indexed by the bit index of the square.
+
+    The rays of a square are a tuple with a ray for each of the DIAGONAL_DELTAS, in the same order.
+    Each ray is a tuple with a bitboard for each square that can be reached by moving from the square in that direction, in order of distance, up to the edge of the board.
+    Each of these bitboards contains only that square. Bit indices that do not correspond to a square map to an empty tuple.
+
+    Since the rays only depend on the shape of the board, this table is created only once for each board shape.
+    """
+
+    rays: Final[list[tuple[tuple[int, ...], ...]]] = [()] * get_bit_index(0, row_count, column_count)
+    for y in range(row_count):
+        for x in range(column_count):
+            square_rays: list[tuple[int, ...]] = []
+            for delta_x, delta_y in DIAGONAL_DELTAS:
+                ray: list[int] = []
+                ray_x, ray_y = x + delta_x, y + delta_y
+                while 0 <= ray_x < column_count and 0 <= ray_y < row_count:
+                    ray.append(1 << get_bit_index(ray_x, ray_y, column_count))
+                    ray_x, ray_y = ray_x + delta_x, ray_y + delta_y
+                square_rays.append(tuple(ray))
+            rays[get_bit_index(x, y, column_count)] = tuple(square_rays)
+
+    return tuple(rays)
+
+
+def get_shift(delta_x: int, delta_y: int, column_count: int) -> int:
+    """ Return the number of bits over which a bitboard must be shifted to move its squares by the passed delta_x and delta_y
+    on a board with the passed column_count.
+    """
+
+    return delta_y * (column_count + 1) + delta_x
+
+
+def shift(bitboard: int, bit_count: int) -> int:
+    """ Return the passed bitboard shifted to the left over the passed bit_count, or to the right if the passed bit_count is negative.
+
+    Note that squares can be shifted outside the board. Use a bitwise AND with a bitboard that contains only squares on the board to remove them.
+    """
+
+    return bitboard << bit_count if bit_count >= 0 else bitboard >> -bit_count
+
+
+def iterate_bit_indices(bitboard: int) -> Iterator[int]:
+    """ Yield the bit index of each square in the passed bitboard, from low to high. """
+
+    while bitboard:
+        lowest_bit: int = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
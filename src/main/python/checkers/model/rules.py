@@ -6,219 +6,269 @@
 
 The rules of international checkers are described on https://en.wikipedia.org/wiki/International_draughts
 """
-from typing import Final
+from functools import cache
+from typing import Callable, Final
 
-from checkers.model.util import CheckersBoard, CheckersGameResult, CheckersJump, CheckersMove, CheckersPiece, CheckersPieceType, CheckersPlayer, Index2D
+from checkers.model.bitboard import DIAGONAL_DELTAS, get_diagonal_rays, get_shift, get_square_bitboard, iterate_bit_indices, shift
+from checkers.model.util import (CheckersBoard, CheckersGameResult, CheckersMove, CheckersPiece, CheckersPieceType, CheckersPlayer, DARK_KING, get_index_2d_table,
+                                 Index2D, LIGHT_KING)
 
 BOARD_SHAPE: Final[tuple[int, int]] = (10, 10)  # Shape of a checkers board (row count, column count).
 
-DIAGONAL_DIRECTIONS: Final[tuple[Index2D, ...]] = (Index2D(-1, 1), Index2D(1, 1), Index2D(1, -1), Index2D(-1, -1))
-LIGHT_PLAYER_FORWARD_DIRECTIONS: Final[tuple[Index2D, ...]] = (Index2D(-1, 1), Index2D(1, 1))
-DARK_PLAYER_FORWARD_DIRECTIONS: Final[tuple[Index2D, ...]] = (Index2D(1, -1), Index2D(-1, -1))
-
-EMPTY: Final[None] = None  # Alias to indicate an empty square on a checkers board.
+DIAGONAL_DIRECTIONS: Final[tuple[Index2D, ...]] = tuple(Index2D.of(delta_x, delta_y) for delta_x, delta_y in DIAGONAL_DELTAS)  # Same order as the diagonal rays.
+LIGHT_PLAYER_FORWARD_DIRECTIONS: Final[tuple[Index2D, ...]] = (Index2D.of(-1, 1), Index2D.of(1, 1))
+DARK_PLAYER_FORWARD_DIRECTIONS: Final[tuple[Index2D, ...]] = (Index2D.of(1, -1), Index2D.of(-1, -1))
+FORWARD_DIRECTIONS: Final[dict[CheckersPlayer: tuple[Index2D, ...]]] = {
+    CheckersPlayer.LIGHT: LIGHT_PLAYER_FORWARD_DIRECTIONS,
+    CheckersPlayer.DARK: DARK_PLAYER_FORWARD_DIRECTIONS
+}
+# Row index of the kings row of each player. Like a list index, -1 refers to the last row of the board.
+KINGS_ROW_INDICES: Final[dict[CheckersPlayer: int]] = {CheckersPlayer.LIGHT: -1, CheckersPlayer.DARK: 0}
 
 
 def determine_legal_moves(current_player: CheckersPlayer, board: CheckersBoard) -> list[CheckersMove]:
     """ Return a tuple with all legal moves for the passed current_player on the passed board. Return an empty tuple if there are no legal moves. """
 
-    # Gather capturing moves.
-    moves: Final[list[CheckersMove]] = []
-    visited_squares: Final[list[Index2D]] = []  # Temporary list to keep track of visited squares, which together form a (partial) move.
-    captured_squares: Final[list[Index2D]] = []  # Temporary list to keep track of captured squares.
-    # Loop over all squares that contain pieces owned by the current player.
-    for square, piece in board:
-        if piece.owner is not current_player:
-            continue
+    # The moves are determined using the bitboards of the passed board, which are described in the bitboard module.
+    # Squares are represented by bitboards that contain only that square, so that checking whether a square is part of a set of squares is a single bitwise AND.
+    own_bitboard: Final[int] = board.get_bitboard(current_player)
+    opponent_bitboard: Final[int] = board.get_bitboard(current_player.opponent)
+    king_bitboard: Final[int] = board.king_bitboard
+    empty_bitboard: Final[int] = board.empty_bitboard
+    diagonal_rays: Final[tuple[tuple[tuple[int, ...], ...], ...]] = board.diagonal_rays
 
-        # Temporarily remove piece from the board, otherwise it would block moves where the piece gets back to or passes its starting square after several jumps.
-        board[square] = None
+    # Gather capturing moves.
+    # Each capturing move is gathered as a tuple with a bitboard for each visited square. Only the moves that are legal are converted to CheckersMove objects.
+    capturing_moves: Final[list[tuple[int, ...]]] = []
+    visited_square_bits: Final[list[int]] = []  # Temporary list to keep track of visited squares, which together form a (partial) move.
+    # Searching for capturing moves is expensive, while in most positions no piece can capture at all.
+    # Therefore, first determine cheaply which pieces can make at least one jump, and only search for capturing moves of those pieces.
+    capturing_piece_bitboard: int = determine_jumping_man_bitboard(own_bitboard & ~king_bitboard, opponent_bitboard, empty_bitboard,
+                                                                   get_diagonal_shifts(board.column_count))
+    for bit_index in iterate_bit_indices(own_bitboard & king_bitboard):
+        if can_king_jump(diagonal_rays[bit_index], opponent_bitboard, empty_bitboard):
+            capturing_piece_bitboard |= 1 << bit_index
+    # Loop over all squares that contain pieces owned by the current player that can capture.
+    for bit_index in iterate_bit_indices(capturing_piece_bitboard):
+        origin_bit: int = 1 << bit_index
 
         # Add capturing moves for piece.
-        visited_squares.append(square)
-        add_legal_capturing_moves(piece, visited_squares, captured_squares, board, moves)
-        visited_squares.pop()
-
-        # Put piece back on the board.
-        board[square] = piece
+        # The square of the moving piece counts as empty, otherwise it would block moves where the piece gets back to or passes its starting square after several jumps.
+        visited_square_bits.append(origin_bit)
+        add_legal_capturing_moves(bool(origin_bit & king_bitboard), visited_square_bits, 0, opponent_bitboard, empty_bitboard | origin_bit,
+                                  diagonal_rays, capturing_moves)
+        visited_square_bits.pop()
 
     # If capturing is possible, it is mandatory to pick a capturing move with the maximum possible number of captures.
-    if moves:
-        # At this point the list of moves contains only capturing moves.
+    if capturing_moves:
         # Return only the moves with the maximum possible number of captures, i.e. the moves with the maximum possible length.
-        max_move_length: Final[int] = max(len(move) for move in moves)
-        return [move for move in moves if len(move) == max_move_length]
+        max_move_length: Final[int] = max(len(move) for move in capturing_moves)
+        index_2d_table: Final[tuple[Index2D | None, ...]] = board.index_2d_table
+        return [CheckersMove(tuple(index_2d_table[square_bit.bit_length() - 1] for square_bit in move))
+                for move in capturing_moves if len(move) == max_move_length]
 
     # If capturing is not possible, gather non-capturing moves.
-    # At this point the list of moves is empty.
-    forward_directions: Final[tuple[Index2D, ...]] = get_forward_directions(current_player)
-    # Loop over all squares that contain pieces owned by the current player.
-    for square, piece in board:
-        if piece.owner is not current_player:
-            continue
-
-        add_legal_non_capturing_moves(piece.type, forward_directions, square, board, moves)
+    moves: Final[list[CheckersMove]] = []
+    add_legal_non_capturing_man_moves(own_bitboard & ~king_bitboard, get_forward_shifts(current_player, board.column_count), board, moves)
+    for bit_index in iterate_bit_indices(own_bitboard & king_bitboard):
+        add_legal_non_capturing_king_moves(bit_index, empty_bitboard, diagonal_rays, board, moves)
 
     return moves
 
 
-def add_legal_non_capturing_moves(piece_type: CheckersPieceType, forward_directions: tuple[Index2D, ...], origin: Index2D, board: CheckersBoard,
-                                  moves: list[CheckersMove]):
-    """ Construct all legal non-capturing moves for a piece with the passed piece_type and forward_directions at the passed square (origin) on the passed board,
-    and add them to the passed list of moves.
+def determine_jumping_man_bitboard(man_bitboard: int, opponent_bitboard: int, empty_bitboard: int, diagonal_shifts: tuple[int, ...]) -> int:
+    """ Return a bitboard with the men in the passed man_bitboard that can jump over one of the pieces in the passed opponent_bitboard
+    to one of the free squares in the passed empty_bitboard. The passed diagonal_shifts are the bit shifts of all diagonal directions, see get_diagonal_shifts().
+    """
+
+    # A man can jump in a diagonal direction if the square one step in that direction contains an enemy piece and the square two steps in that direction is free.
+    # Determine this for all men at once, by shifting the opponent and empty bitboards back towards the men.
+    jumping_man_bitboard: int = 0
+    for bit_shift in diagonal_shifts:
+        jumping_man_bitboard |= man_bitboard & shift(opponent_bitboard, -bit_shift) & shift(empty_bitboard, -2 * bit_shift)
+
+    return jumping_man_bitboard
+
 
-    This function assumes that the passed square (origin) is within the passed board.
-    Note that the passed board does not actually need to contain a piece at the passed square (origin) in order for this function to work.
+def can_king_jump(rays: tuple[tuple[int, ...], ...], opponent_bitboard: int, empty_bitboard: int) -> bool:
+    """ Return True if a king at the square with the passed rays, see CheckersBoard.diagonal_rays, can jump over one of the pieces in the passed opponent_bitboard
+    to one of the free squares in the passed empty_bitboard. Otherwise, return False.
     """
 
-    match piece_type:
-        case CheckersPieceType.MAN:
-            # A man can move one step in one of the diagonally forward directions if the destination square is free.
-            for delta in forward_directions:
-                destination: Index2D = origin + delta
-                if destination in board and board[destination] is EMPTY:
-                    moves.append(CheckersMove((origin, destination)))
+    for ray in rays:
+        # Search for the nearest piece in the current direction.
+        for square_index, square_bit in enumerate(ray):
+            if not square_bit & empty_bitboard:
+                # The nearest piece must be an enemy piece and the square right behind it must be free.
+                if square_bit & opponent_bitboard and square_index + 1 < len(ray) and ray[square_index + 1] & empty_bitboard:
+                    return True
+                break
 
-        case CheckersPieceType.KING:
-            # A king can move any number of steps in one of the diagonal directions as long as it has a free path (not blocked by any other pieces).
-            for delta in DIAGONAL_DIRECTIONS:
-                # Continue moving in the current direction until the path is blocked.
-                destination: Index2D = origin + delta
-                while destination in board:
-                    if board[destination] is not EMPTY:
-                        break
+    return False
 
-                    moves.append(CheckersMove((origin, destination)))
 
-                    destination += delta
+def add_legal_non_capturing_man_moves(man_bitboard: int, forward_shifts: tuple[int, ...], board: CheckersBoard, moves: list[CheckersMove]):
+    """ Construct all legal non-capturing moves for the men in the passed man_bitboard on the passed board, and add them to the passed list of moves.
+    The passed forward_shifts are the bit shifts that correspond to the diagonally forward directions of the men, see get_forward_shifts().
 
-        case _:
-            raise ValueError(f"Invalid {CheckersPieceType.__name__} '{piece_type}'.")
+    Note that the passed board does not actually need to contain men at the squares in the passed man_bitboard in order for this function to work.
+    """
 
+    # Since this function creates most of the moves during a playout, the table and methods that are used for each move are looked up only once.
+    index_2d_table: Final[tuple[Index2D | None, ...]] = board.index_2d_table
+    add_move: Final[Callable[[CheckersMove], None]] = moves.append
 
-def add_legal_capturing_moves(piece: CheckersPiece, visited_squares: list[Index2D], captured_squares: list[Index2D], board: CheckersBoard,
-                              moves: list[CheckersMove]):
-    """ Construct all legal capturing moves for the passed piece at the last square in the passed visited_squares on the passed board,
-    and add them to the passed list of moves.
+    # A man can move one step in one of the diagonally forward directions if the destination square is free.
+    # Determine the destinations of all men at once, by shifting the man bitboard one step in a forward direction and keeping only the free squares.
+    empty_bitboard: Final[int] = board.empty_bitboard
+    for bit_shift in forward_shifts:
+        for destination_bit_index in iterate_bit_indices(shift(man_bitboard, bit_shift) & empty_bitboard):
+            add_move(CheckersMove((index_2d_table[destination_bit_index - bit_shift], index_2d_table[destination_bit_index])))
 
-    This function assumes that the passed visited_squares is not empty and that the squares in visited_squares and captured_squares are within the passed board.
-    Note that the passed board does not actually need to contain a piece at the last square in the passed visited_squares in order for this function to work.
 
-    This function can be called recursively.
+def add_legal_non_capturing_king_moves(origin_bit_index: int, empty_bitboard: int, diagonal_rays: tuple[tuple[tuple[int, ...], ...], ...], board: CheckersBoard,
+                                       moves: list[CheckersMove]):
+    """ Construct all legal non-capturing moves for a king at the square with the passed origin_bit_index on the passed board, and add them to the passed list of moves.
+    The passed empty_bitboard contains the squares that the king can move to and the passed diagonal_rays are the rays of all squares, see CheckersBoard.diagonal_rays.
+
+    Note that the passed board does not actually need to contain a king at the square with the passed origin_bit_index in order for this function to work.
     """
 
-    # Gather all legal jumps that start from the last square in visited_squares.
-    jumps: Final[list[CheckersJump]] = []
-    add_legal_jumps(piece, visited_squares[-1], captured_squares, board, jumps)
-
-    # If no further jumps are possible, then the current partial move is a complete move.
-    if not jumps:
-        # Add current partial move to the list of moves and return.
-        if len(visited_squares) >= 2:
-            moves.append(CheckersMove(tuple(visited_squares)))
-        return
-
-    # After a successful jump, another jump can be made as part of the same move.
-    for jump in jumps:
-        visited_squares.append(jump.destination)
-        captured_squares.append(jump.captured_square)
-        # Add additional jumps recursively.
-        add_legal_capturing_moves(piece, visited_squares, captured_squares, board, moves)
-        captured_squares.pop()
-        visited_squares.pop()
-
-
-def add_legal_jumps(piece: CheckersPiece, origin: Index2D, captured_squares: list[Index2D], board: CheckersBoard,
-                    jumps: list[CheckersJump]):
-    """ Construct all legal jumps for the passed piece at the passed square (origin) on the passed board,
-    and add them to the passed list of jumps.
-
-    This function assumes that the passed square (origin) is within the passed board.
-    Note that the passed board does not actually need to contain a piece at the passed square (origin) in order for this function to work.
+    # The table and methods that are used for each move are looked up only once.
+    index_2d_table: Final[tuple[Index2D | None, ...]] = board.index_2d_table
+    add_move: Final[Callable[[CheckersMove], None]] = moves.append
+    origin: Final[Index2D] = index_2d_table[origin_bit_index]
+
+    # A king can move any number of steps in one of the diagonal directions as long as it has a free path (not blocked by any other pieces).
+    for ray in diagonal_rays[origin_bit_index]:
+        # Continue moving in the current direction until the path is blocked or the edge of the board has been reached.
+        for destination_bit in ray:
+            if not destination_bit & empty_bitboard:
+                break
+
+            add_move(CheckersMove((origin, index_2d_table[destination_bit.bit_length() - 1])))
+
+
+def add_legal_capturing_moves(is_king: bool, visited_square_bits: list[int], captured_bitboard: int, opponent_bitboard: int, empty_bitboard: int,
+                              diagonal_rays: tuple[tuple[tuple[int, ...], ...], ...], moves: list[tuple[int, ...]]):
+    """ Construct all capturing moves for a man or king (is_king) at the last square in the passed visited_square_bits, and add them to the passed list of moves.
+    Each move is added as a tuple with a bitboard for each visited square, which contains only that square.
+    Note that these moves are not necessarily legal, since only the moves with the maximum possible number of captures are legal.
+
+    The passed captured_bitboard contains the squares of the pieces that have been captured so far during the current (partial) move,
+    the passed opponent_bitboard contains the squares of the opponent's pieces and the passed empty_bitboard contains the free squares.
+    Captured pieces are only removed from the board after the move has been completed, so they stay part of the opponent bitboard and block other jumps.
+    The passed diagonal_rays are the rays of all squares, see CheckersBoard.diagonal_rays.
+
+    This function assumes that the passed visited_square_bits is not empty.
+
+    This function can be called recursively.
     """
 
-    match piece.type:
-        case CheckersPieceType.MAN:
-            # A man can jump over a single square that contains an enemy piece in one of the diagonal directions if the destination square is free.
-            for delta in DIAGONAL_DIRECTIONS:
-                # The captured square must contain a piece owned by another player.
-                captured_square: Index2D = origin + delta
-                if captured_square not in board:
-                    continue
-                captured_piece: CheckersPiece | None = board[captured_square]
-                if captured_piece is None or captured_piece.owner is piece.owner:
-                    continue
-
-                # The destination square must be empty.
-                destination: Index2D = captured_square + delta
-                if destination not in board or board[destination] is not EMPTY:
-                    continue
-
-                # Cannot capture the same piece more than once.
-                if captured_square in captured_squares:
-                    continue
-
-                jumps.append(CheckersJump(destination, captured_square))
-
-        case CheckersPieceType.KING:
-            # A king can jump over a single square that contains an enemy piece plus any number of empty squares in one of the diagonal directions.
-            for delta in DIAGONAL_DIRECTIONS:
-                # Search for the nearest piece in the current direction.
-                captured_piece_owner: CheckersPlayer | None = None
-                captured_square: Index2D | None = None
-                square: Index2D = origin + delta
-                while square in board:
-                    if captured_piece := board[square]:
-                        captured_piece_owner = captured_piece.owner
-                        captured_square = square
-                        break
-
-                    square += delta
-
-                # The captured piece must be owned by another player.
-                if captured_piece_owner is None or captured_piece_owner is piece.owner:
-                    continue
-
-                # Cannot capture the same piece more than once.
-                if captured_square in captured_squares:
-                    continue
-
-                # Continue moving in the current direction until the path is blocked.
-                destination: Index2D = captured_square + delta
-                while destination in board:
-                    if board[destination] is not EMPTY:
-                        break
-
-                    jumps.append(CheckersJump(destination, captured_square))
-
-                    destination += delta
-
-        case _:
-            raise ValueError(f"Invalid {CheckersPieceType.__name__} '{piece.type}'.")
+    # Pieces that have already been captured during the current (partial) move cannot be captured again.
+    capturable_bitboard: Final[int] = opponent_bitboard & ~captured_bitboard
+    rays: Final[tuple[tuple[int, ...], ...]] = diagonal_rays[visited_square_bits[-1].bit_length() - 1]
+
+    # Search for legal jumps that start from the last square in visited_square_bits.
+    # After a successful jump, another jump can be made as part of the same move, so each jump is followed recursively as soon as it has been found.
+    # This avoids gathering the jumps in a separate list first, since this function is called for every jump of every capturing move.
+    is_complete: bool = True  # Whether the current partial move is a complete move, i.e. whether no further jumps are possible.
+    if not is_king:
+        # A man can jump over a single square that contains an enemy piece in one of the diagonal directions if the destination square is free.
+        for ray in rays:
+            # The ray must be long enough to contain the captured square and the destination square.
+            if len(ray) < 2:
+                continue
+
+            # The captured square must contain a piece that can be captured and the destination square must be empty.
+            captured_square_bit, destination_bit = ray[0], ray[1]
+            if captured_square_bit & capturable_bitboard and destination_bit & empty_bitboard:
+                is_complete = False
+                # Add additional jumps recursively.
+                visited_square_bits.append(destination_bit)
+                add_legal_capturing_moves(False, visited_square_bits, captured_bitboard | captured_square_bit, opponent_bitboard, empty_bitboard, diagonal_rays, moves)
+                visited_square_bits.pop()
+
+    else:
+        # A king can jump over a single square that contains an enemy piece plus any number of empty squares in one of the diagonal directions.
+        for ray in rays:
+            # Search for the nearest piece in the current direction.
+            for captured_square_index, captured_square_bit in enumerate(ray):
+                if not captured_square_bit & empty_bitboard:
+                    break
+            else:  # If there is no piece in the current direction.
+                continue
+
+            # The nearest piece must be a piece that can be captured.
+            if not captured_square_bit & capturable_bitboard:
+                continue
+
+            # Continue moving in the current direction until the path is blocked or the edge of the board has been reached.
+            for destination_bit in ray[captured_square_index + 1:]:
+                if not destination_bit & empty_bitboard:
+                    break
+
+                is_complete = False
+                # Add additional jumps recursively.
+                visited_square_bits.append(destination_bit)
+                add_legal_capturing_moves(True, visited_square_bits, captured_bitboard | captured_square_bit, opponent_bitboard, empty_bitboard, diagonal_rays, moves)
+                visited_square_bits.pop()
+
+    # If no further jumps are possible, then add the current partial move to the list of moves.
+    if is_complete and len(visited_square_bits) >= 2:
+        moves.append(tuple(visited_square_bits))
 
 
 def get_forward_directions(player: CheckersPlayer) -> tuple[Index2D, ...]:
     """ Return the directions that are diagonally forward, as seen from the passed player's perspective. """
 
-    match player:
-        case CheckersPlayer.LIGHT:
-            return LIGHT_PLAYER_FORWARD_DIRECTIONS
-        case CheckersPlayer.DARK:
-            return DARK_PLAYER_FORWARD_DIRECTIONS
-        case _:
-            raise ValueError(f"Invalid {CheckersPlayer.__name__} '{player}'.")
+    try:
+        return FORWARD_DIRECTIONS[player]
+    except KeyError:
+        raise ValueError(f"Invalid {CheckersPlayer.__name__} '{player}'.") from None
+
+
+@cache
+def get_diagonal_shifts(column_count: int) -> tuple[int, ...]:
+    """ Return the bit shifts that move the squares in a bitboard one step in each of the DIAGONAL_DIRECTIONS, in the same order,
+    on a board with the passed column_count. The layout of bitboards is described in the bitboard module.
+    """
+
+    return tuple(get_shift(delta.x, delta.y, column_count) for delta in DIAGONAL_DIRECTIONS)
+
+
+@cache
+def get_forward_shifts(player: CheckersPlayer, column_count: int) -> tuple[int, ...]:
+    """ Return the bit shifts that move the squares in a bitboard one step diagonally forward, as seen from the passed player's perspective,
+    on a board with the passed column_count. The layout of bitboards is described in the bitboard module.
+    """
+
+    return tuple(get_shift(delta.x, delta.y, column_count) for delta in get_forward_directions(player))
+
+
+def warm_caches(row_count: int, column_count: int):
+    """ Create all cached tables for a board with the passed row_count and column_count in advance.
+
+    These tables are normally created the first time that they are needed. Call this function before starting a search,
+    for example once in each new worker process, so that the first playouts do not have to wait for the tables to be created.
+    """
+
+    get_square_bitboard(row_count, column_count)
+    get_index_2d_table(row_count, column_count)
+    get_diagonal_rays(row_count, column_count)
+    get_diagonal_shifts(column_count)
+    for player in CheckersPlayer:
+        get_forward_shifts(player, column_count)
 
 
 def get_kings_row_index(player: CheckersPlayer, board: CheckersBoard) -> int:
     """ Return the row index of the far edge of the passed board, as seen from the passed player's perspective. """
 
-    match player:
-        case CheckersPlayer.LIGHT:
-            return board.row_count - 1
-        case CheckersPlayer.DARK:
-            return 0
-        case _:
-            raise ValueError(f"Invalid {CheckersPlayer.__name__} '{player}'.")
+    try:
+        # Convert a negative row index to the corresponding row index counted from the first row.
+        return KINGS_ROW_INDICES[player] % board.row_count
+    except KeyError:
+        raise ValueError(f"Invalid {CheckersPlayer.__name__} '{player}'.") from None
 
 
 def apply(move: CheckersMove, board: CheckersBoard):
@@ -227,38 +277,48 @@ def apply(move: CheckersMove, board: CheckersBoard):
     This function assumes that the passed move is legal for the passed board.
     """
 
+    # The squares of the move are converted to bit indices, which are described in the bitboard module, so that the board can be changed without any 2D indices.
+    # The origin and destination are read from the visited squares directly, which is cheaper than calling the properties of the move.
+    # Since this function is called for every move of every playout, attributes of the board that are used more than once are looked up only once,
+    # and the conversion of 2D indices to bit indices is inlined.
+    get_piece: Final[Callable[[int], CheckersPiece | None]] = board.get_piece
+    set_piece: Final[Callable[[int, CheckersPiece | None], None]] = board.set_piece
+    row_stride: Final[int] = board.column_count + 1  # Difference between the bit indices of two squares in consecutive rows of the same column.
+
     # Pick up piece.
-    origin: Final[Index2D] = move.origin
-    destination: Final[Index2D] = move.destination
-    moving_piece: CheckersPiece = board[origin]
-    board[origin] = None
+    visited_squares: Final[tuple[Index2D, ...]] = move.visited_squares
+    origin: Final[Index2D] = visited_squares[0]
+    origin_bit_index: Final[int] = origin.y * row_stride + origin.x  # Same as get_bit_index() in the bitboard module.
+    destination: Final[Index2D] = visited_squares[-1]
+    moving_piece: CheckersPiece = get_piece(origin_bit_index)
+    set_piece(origin_bit_index, None)
 
     # Crown piece.
     if destination.y == get_kings_row_index(moving_piece.owner, board) and moving_piece.type is CheckersPieceType.MAN:
-        moving_piece = CheckersPiece(moving_piece.owner, CheckersPieceType.KING)
+        moving_piece = LIGHT_KING if moving_piece.owner is CheckersPlayer.LIGHT else DARK_KING
 
     # Remove captured pieces.
     # This must be done after moving_piece has been picked up from the board and before it is put down again,
     # since for a moving king the origin and/or destination square can be between two visited squares.
-    for previous_square, square in zip(move.visited_squares[:-1], move.visited_squares[1:]):
-        remove_pieces_between(previous_square, square, board)
+    # Between each pair of consecutive visited squares, walk along the path using the bit indices of the squares.
+    # The bit indices of consecutive squares on a diagonal path differ by a constant stride: one row plus or minus one column.
+    # This is done inline and without slicing the visited squares into pairs, since this function is called for every move of every playout.
+    previous_square: Index2D = origin
+    previous_bit_index: int = origin_bit_index
+    for i in range(1, len(visited_squares)):
+        square: Index2D = visited_squares[i]
+        bit_index: int = square.y * row_stride + square.x  # Same as get_bit_index() in the bitboard module.
+        stride: int = (row_stride if square.y > previous_square.y else -row_stride) + (1 if square.x > previous_square.x else -1)
+        occupied_bitboard: int = board.occupied_bitboard
+        for between_bit_index in range(previous_bit_index + stride, bit_index, stride):
+            if occupied_bitboard >> between_bit_index & 1:
+                set_piece(between_bit_index, None)
+
+        previous_square, previous_bit_index = square, bit_index
 
     # Put down piece.
     # Note that for a move with many jumps a square can be visited more than once and it is possible that origin and destination are the same square.
-    board[destination] = moving_piece
-
-
-def remove_pieces_between(start_square: Index2D, end_square: Index2D, board: CheckersBoard):
-    """ Remove all pieces between the passed start_square and end_square (both exclusive) from the passed board.
-
-    This function assumes that the passed start_square and end_square are within the passed board and are on the same diagonal path.
-    """
-
-    delta: Final[Index2D] = Index2D.sign(end_square - start_square)
-    square: Index2D = start_square + delta
-    while square != end_square:
-        board[square] = None
-        square += delta
+    set_piece(previous_bit_index, moving_piece)
 
 
 def determine_result(board: CheckersBoard, current_player: CheckersPlayer, ply_count: int, legal_move_count: int) -> CheckersGameResult | None:
@@ -268,45 +328,13 @@ def determine_result(board: CheckersBoard, current_player: CheckersPlayer, ply_c
 
     # If the current player cannot make a move, then the other player is the winner.
     if legal_move_count <= 0:
-        match current_player:
-            case CheckersPlayer.LIGHT:
-                winner: Final[CheckersPlayer] = CheckersPlayer.DARK
-            case CheckersPlayer.DARK:
-                winner: Final[CheckersPlayer] = CheckersPlayer.LIGHT
-            case _:
-                raise ValueError(f"Invalid {CheckersPlayer.__name__} '{current_player}'.")
-        return CheckersGameResult(winner, ply_count)
-
-    # Count pieces.
-    light_man_count: int = 0
-    dark_man_count: int = 0
-    light_king_count: int = 0
-    dark_king_count: int = 0
-    for _, piece in board:
-        match piece.owner:
-            case CheckersPlayer.LIGHT:
-                match piece.type:
-                    case CheckersPieceType.MAN:
-                        light_man_count += 1
-                    case CheckersPieceType.KING:
-                        light_king_count += 1
-                    case _:
-                        raise ValueError(f"Invalid {CheckersPieceType.__name__} '{piece.type}'.")
-
-            case CheckersPlayer.DARK:
-                match piece.type:
-                    case CheckersPieceType.MAN:
-                        dark_man_count += 1
-                    case CheckersPieceType.KING:
-                        dark_king_count += 1
-                    case _:
-                        raise ValueError(f"Invalid {CheckersPieceType.__name__} '{piece.type}'.")
-
-            case _:
-                raise ValueError(f"Invalid {CheckersPlayer.__name__} '{piece.owner}'.")
+        return CheckersGameResult(current_player.opponent, ply_count)
 
     # A king-versus-king endgame is automatically declared a draw.
-    if light_man_count == 0 and dark_man_count == 0 and light_king_count == 1 and dark_king_count == 1:
+    # The pieces do not need to be counted one by one: the board is in a king-versus-king endgame
+    # if none of the occupied squares is occupied by a man and each player has exactly one piece.
+    if (not board.occupied_bitboard & ~board.king_bitboard
+            and board.count_pieces(CheckersPlayer.LIGHT) == 1 and board.count_pieces(CheckersPlayer.DARK) == 1):
         return CheckersGameResult(None, ply_count)
 
     # If the game is still in progress, there is no result, so return None.
@@ -3,11 +3,14 @@
 # ------------------------------------------------------------------------------
 
 """ This module contains code that stores and changes the state of a checkers game. """
-from copy import deepcopy
-from typing import Final
+from functools import cache
+from itertools import repeat
+from operator import is_
+from typing import Final, Self
 
+from checkers.model.bitboard import get_bit_index
 from checkers.model.rules import apply, determine_legal_moves, determine_result
-from checkers.model.util import CheckersBoard, CheckersGameResult, CheckersMove, CheckersPiece, CheckersPieceType, CheckersPlayer, Index2D
+from checkers.model.util import CheckersBoard, CheckersBoardView, CheckersGameResult, CheckersMove, CheckersPlayer, DARK_MAN, LIGHT_MAN
 
 
 class CheckersState:
@@ -17,7 +20,7 @@ class CheckersState:
     The rules of international checkers are described on https://en.wikipedia.org/wiki/International_draughts
     """
 
-    __slots__ = ('_board', '_current_player', '_ply_count', '_cached_legal_moves')
+    __slots__ = ('_board', 'current_player', 'ply_count', '_cached_legal_moves', '_cached_legal_move_set', '_undo_stack')
 
     def __init__(self, row_count: int, column_count: int):
         """ Create a checkers state with an empty checkers board that has the passed shape. """
@@ -34,58 +37,87 @@ class CheckersState:
 
         self._board: Final[CheckersBoard] = CheckersBoard(row_count, column_count)  # Store checkers pieces.
 
-        self._current_player: CheckersPlayer = CheckersPlayer.LIGHT  # The player whose turn it is.
-        self._ply_count: int = 0  # Number of plies (moves) that have been made since the start of the game.
+        # The player whose turn it is and the number of plies (moves) that have been made since the start of the game.
+        # These are plain attributes instead of properties, since they are read after every move during a search. They must only be changed by this state.
+        self.current_player: CheckersPlayer = CheckersPlayer.LIGHT
+        self.ply_count: int = 0
 
         self._cached_legal_moves: tuple[CheckersMove, ...] | None = None  # Cache legal moves for this state.
+        self._cached_legal_move_set: frozenset[CheckersMove] | None = None  # Cache the same legal moves as a set, which is only created when it is needed.
+
+        # Store the information that is needed to revert each move that was applied with push():
+        # the contents of the board before the move, see CheckersBoard.save_contents(), the player who made the move and the legal moves before the move.
+        # Since the contents of the board are only a few integers, restoring them is cheaper than undoing the move square by square.
+        self._undo_stack: Final[list[tuple[tuple[int, int, int], CheckersPlayer, tuple[CheckersMove, ...]]]] = []
+
+    def clone(self) -> Self:
+        """ Return a copy of this state that can be changed independently of this state. """
+
+        # Create the copy with the constructor, which creates its own board and undo stack, and then copy the contents of this state into it.
+        state: Final[CheckersState] = CheckersState(self._board.row_count, self._board.column_count)
+        state._board.restore_contents(self._board.save_contents())
+        state.current_player = self.current_player
+        state.ply_count = self.ply_count
+        state._cached_legal_moves = self._cached_legal_moves  # The cached tuple of legal moves is immutable, so it can be shared.
+        state._cached_legal_move_set = self._cached_legal_move_set  # The same holds for the cached set of legal moves.
+        # The undo stack of the copy stays empty: the moves that were applied to this state with push() cannot be reverted on the copy.
+
+        return state
+
+    def __reduce__(self) -> tuple:
+        """ Copy or pickle only the shape of the board, the contents of the board, the current player and the ply count of this state.
+
+        This keeps the state small when it is sent to another process, like the worker processes of the AI.
+        The copy is created again with __init__(), so that its board uses the cached tables for its shape in the process that receives it.
+        The legal moves of the copy are determined again when they are needed, and moves that were applied to this state with push() cannot be reverted on the copy.
+        """
+
+        return self.__class__, (self._board.row_count, self._board.column_count), (self._board.save_contents(), self.current_player, self.ply_count)
+
+    def __setstate__(self, attributes: tuple[tuple[int, int, int], CheckersPlayer, int]):
+        """ Restore the attributes that were returned by __reduce__() on a copy of a state. """
+
+        board_contents, self.current_player, self.ply_count = attributes
+        self._board.restore_contents(board_contents)
 
     @property
     def board(self) -> CheckersBoard:
-        return deepcopy(self._board)
+        """ Return a copy of the board of this state, which can be changed without affecting this state. """
 
-    @property
-    def current_player(self) -> CheckersPlayer:
-        return self._current_player
+        return self._board.clone()
 
     @property
-    def ply_count(self) -> int:
-        return self._ply_count
+    def board_view(self) -> CheckersBoardView:
+        """ Return a read-only view of the board of this state. This is cheaper than a copy, but the view shows the changes when this state changes. """
+
+        return CheckersBoardView(self._board)
 
     def clear(self):
         """ Reset this state to an empty checkers board. """
 
         # Remove all pieces from the board.
-        for square, _ in self._board:
-            self._board[square] = None
+        self._board.clear()
 
         # Reset other attributes.
-        self._current_player = CheckersPlayer.LIGHT
-        self._ply_count = 0
+        self.current_player = CheckersPlayer.LIGHT
+        self.ply_count = 0
 
-        # Clear cache.
+        # Clear cache and moves that can be reverted.
         self._cached_legal_moves = None
+        self._cached_legal_move_set = None
+        self._undo_stack.clear()
 
     def start_new_game(self):
         """ Reset this state to the starting position of a checkers game. """
 
         self.clear()
 
-        # Add light pieces.
-        occupied_row_count: Final[int] = (self._board.row_count - 1) // 2
-        for x in range(self._board.column_count):
-            for y in range(occupied_row_count):
-                if (x + y) % 2 == 0:
-                    self._board[Index2D(x, y)] = CheckersPiece(CheckersPlayer.LIGHT, CheckersPieceType.MAN)
-
-        # Add dark pieces.
-        for x in range(self._board.column_count):
-            for y in range(self._board.row_count - occupied_row_count, self._board.row_count):
-                if (x + y) % 2 == 0:
-                    self._board[Index2D(x, y)] = CheckersPiece(CheckersPlayer.DARK, CheckersPieceType.MAN)
+        # Put the pieces of the starting position on the board all at once.
+        self._board.restore_contents(get_starting_board_contents(self._board.row_count, self._board.column_count))
 
         # The player with the light pieces moves first.
-        self._current_player = CheckersPlayer.LIGHT
-        self._ply_count = 0
+        self.current_player = CheckersPlayer.LIGHT
+        self.ply_count = 0
 
     @property
     def legal_moves(self) -> tuple[CheckersMove, ...]:
@@ -93,28 +125,124 @@ class CheckersState:
 
         if self._cached_legal_moves is None:
             # Cache legal moves.
-            self._cached_legal_moves = tuple(determine_legal_moves(self._current_player, self._board))
+            self._cached_legal_moves = tuple(determine_legal_moves(self.current_player, self._board))
 
         return self._cached_legal_moves
 
+    def _is_legal(self, move: CheckersMove) -> bool:
+        """ Return True if the passed move is legal for this state. Otherwise, return False. """
+
+        legal_moves: Final[tuple[CheckersMove, ...]] = self.legal_moves
+
+        # Most moves that are applied, like the moves of the AI, have been taken from the legal moves of this state.
+        # Such moves are found by comparing their identities, which is much faster than comparing moves for equality or hashing them.
+        if any(map(is_, legal_moves, repeat(move))):
+            return True
+
+        # Look up other moves, like moves that have been selected by a user, in a set of the legal moves, so that the moves do not need to be compared one by one.
+        if self._cached_legal_move_set is None:
+            self._cached_legal_move_set = frozenset(legal_moves)
+
+        return move in self._cached_legal_move_set
+
     def apply(self, move: CheckersMove):
-        """ Apply the passed move to this state. If the passed move is not legal for this state, raise an exception. """
+        """ Apply the passed move to this state. If the passed move is not legal for this state, raise an exception.
+
+        A move that is applied with this method cannot be reverted, so no information to revert it is stored.
+        Since moves that were applied earlier with push() could not be reverted in the right order anymore,
+        raise an exception if any of those moves have not been reverted with pop() yet.
+        """
+
+        if self._undo_stack:
+            raise RuntimeError(f"Move '{move}' cannot be applied to state '{self}' before the moves that were applied with push() have been reverted.")
+        if not self._is_legal(move):
+            raise ValueError(f"Move '{move}' is not legal for state '{self}'.")
+
+        self._apply_raw(move)
 
-        if move not in self.legal_moves:
+    def push(self, move: CheckersMove):
+        """ Apply the passed move to this state, so that it can be reverted later by calling pop(). If the passed move is not legal for this state, raise an exception. """
+
+        if not self._is_legal(move):
             raise ValueError(f"Move '{move}' is not legal for state '{self}'.")
 
+        self._push_raw(move)
+
+    def push_unchecked(self, move: CheckersMove):
+        """ Apply the passed move to this state, so that it can be reverted later by calling pop(), without checking whether the move is legal.
+
+        This method is meant for callers that take the move from the legal_moves of this state, like the AI, for which checking the move again is pure overhead.
+        The caller must guarantee that the passed move is legal for this state: applying any other move leaves this state in a position that breaks the rules.
+        """
+
+        self._push_raw(move)
+
+    def _push_raw(self, move: CheckersMove):
+        """ Apply the passed move, which must be legal for this state, so that it can be reverted later by calling pop(). """
+
+        self._undo_stack.append((self._board.save_contents(), self.current_player, self._cached_legal_moves))
+        self._apply_raw(move)
+
+    def _apply_raw(self, move: CheckersMove):
+        """ Apply the passed move, which must be legal for this state, without storing any information to revert it. """
+
         # Update board.
         apply(move, self._board)
 
         # Advance turn to the next player.
-        self._current_player = self._current_player.next()
-        self._ply_count += 1
+        self.current_player = self.current_player.opponent
+        self.ply_count += 1
 
         # Clear cache, since the cached legal moves are no longer valid after making a move.
         self._cached_legal_moves = None
+        self._cached_legal_move_set = None
+
+    def pop(self):
+        """ Revert the last move that was applied to this state with push(). If there is no such move, raise an exception. """
+
+        if not self._undo_stack:
+            raise RuntimeError(f"There is no move to revert for state '{self}'.")
+
+        # Revert board.
+        previous_board_contents, previous_player, previous_legal_moves = self._undo_stack.pop()
+        self._board.restore_contents(previous_board_contents)
+
+        # Give turn back to the player who made the move.
+        self.current_player = previous_player
+        self.ply_count -= 1
+
+        # Restore cache, since the legal moves from before the move are valid again.
+        self._cached_legal_moves = previous_legal_moves
+        self._cached_legal_move_set = None
 
     @property
     def result(self) -> CheckersGameResult | None:
         """ Return the result of a checkers game that has reached this state. Return None if the game is still in progress. """
 
-        return determine_result(self._board, self._current_player, self._ply_count, len(self.legal_moves))
+        return determine_result(self._board, self.current_player, self.ply_count, len(self.legal_moves))
+
+
+@cache
+def get_starting_board_contents(row_count: int, column_count: int) -> tuple[int, int, int]:
+    """ Return the contents of a board with the passed row_count and column_count in the starting position of a checkers game,
+    as returned by CheckersBoard.save_contents().
+
+    Since the starting position only depends on the shape of the board, it is created only once for each board shape.
+    """
+
+    board: Final[CheckersBoard] = CheckersBoard(row_count, column_count)
+
+    # Add light pieces.
+    occupied_row_count: Final[int] = (row_count - 1) // 2
+    for x in range(column_count):
+        for y in range(occupied_row_count):
+            if (x + y) % 2 == 0:
+                board.set_piece(get_bit_index(x, y, column_count), LIGHT_MAN)
+
+    # Add dark pieces.
+    for x in range(column_count):
+        for y in range(row_count - occupied_row_count, row_count):
+            if (x + y) % 2 == 0:
+                board.set_piece(get_bit_index(x, y, column_count), DARK_MAN)
+
+    return board.save_contents()
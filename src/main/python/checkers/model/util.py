@@ -5,29 +5,41 @@
 """ This module contains utility classes that are needed to implement a checkers game. """
 from dataclasses import dataclass
 from enum import auto, Enum, unique
-from typing import Final, Iterator, override, Self
+from functools import cache
+from typing import Callable, Final, Iterator, override, Self
+
+from checkers.model.bitboard import get_bit_index, get_diagonal_rays, get_square_bitboard, iterate_bit_indices
 
 
 @unique
 class CheckersPlayer(Enum):
     """ Store players of a checkers game in the order in which they take turns. """
 
-    # The values of the members of this enumeration are used in the next() method.
+    # The values of the members of this enumeration are used to determine the next player and as indices of per-player data, such as the bitboards of a board.
     LIGHT: Final[int] = 0  # The player with the light pieces.
     DARK: Final[int] = 1  # The player with the dark pieces.
 
+    # Each member also has an attribute 'opponent', which is the player that takes a turn after this player. It is the same as next(), but without a call.
+    # This attribute is assigned below, after all members have been created.
+    opponent: "CheckersPlayer"
+
     def next(self):
         """ Return the player that takes a turn after this player. """
 
-        # Determine the item in the CheckersPlayer enumeration that comes after this item.
-        # After the last item in the CheckersPlayer enumeration, loop back to the first item.
-        return CheckersPlayer((self.value + 1) % len(CheckersPlayer))
+        return self.opponent
 
     @override
     def __str__(self) -> str:
         return self.name
 
 
+# Determine the item in the CheckersPlayer enumeration that comes after each item, once, since the next player is needed after every move.
+# After the last item in the CheckersPlayer enumeration, loop back to the first item.
+for _player in CheckersPlayer:
+    _player.opponent = CheckersPlayer((_player.value + 1) % len(CheckersPlayer))
+del _player
+
+
 @unique
 class CheckersPieceType(Enum):
     """ Store checkers piece types. """
@@ -42,16 +54,42 @@ class CheckersPieceType(Enum):
 
 @dataclass(frozen=True, slots=True)
 class CheckersPiece:
-    """ Store immutable properties of a checkers piece. """
+    """ Store immutable properties of a checkers piece.
+
+    Since checkers pieces are immutable, only a single instance of each possible piece is ever created: creating a piece returns the existing instance
+    with the same owner and type, if any. Therefore, checkers pieces can be compared with 'is'. The four possible pieces are also available as module constants.
+    """
 
     owner: CheckersPlayer
     type: CheckersPieceType
 
+    def __new__(cls, owner: CheckersPlayer, type: CheckersPieceType) -> Self:
+        if (piece := _pieces.get((owner, type))) is None:
+            # Note: object.__new__() is called directly, since super() does not work in a dataclass with slots.
+            piece = object.__new__(cls)
+            _pieces[(owner, type)] = piece
+
+        return piece
+
+    def __reduce__(self) -> tuple:
+        """ Create the piece again with __new__() when it is copied or unpickled, so that the copy is the existing instance. """
+
+        return self.__class__, (self.owner, self.type)
+
     @override
     def __repr__(self) -> str:
         return f"Piece({self.owner!s}, {self.type!s})"
 
 
+_pieces: Final[dict[tuple[CheckersPlayer, CheckersPieceType]: CheckersPiece]] = {}  # The instance of each checkers piece by owner and type.
+
+# The instances of all possible checkers pieces, which are shared by all boards.
+LIGHT_MAN: Final[CheckersPiece] = CheckersPiece(CheckersPlayer.LIGHT, CheckersPieceType.MAN)
+LIGHT_KING: Final[CheckersPiece] = CheckersPiece(CheckersPlayer.LIGHT, CheckersPieceType.KING)
+DARK_MAN: Final[CheckersPiece] = CheckersPiece(CheckersPlayer.DARK, CheckersPieceType.MAN)
+DARK_KING: Final[CheckersPiece] = CheckersPiece(CheckersPlayer.DARK, CheckersPieceType.KING)
+
+
 def sign(value: int) -> int:
     if value > 0:
         return 1
@@ -69,27 +107,42 @@ class Index2D:
         - element-wise addition
         - element-wise subtraction
         - element-wise multiplication by an integer
+
+    Since creating a 2D index is relatively expensive, use the method of() to get a shared 2D index instead of creating a new one.
+    The results of all operations of this class are shared 2D indices as well.
     """
 
     x: int  # Column index.
     y: int  # Row index.
 
+    @classmethod
+    def of(cls, x: int, y: int) -> Self:
+        """ Return the shared 2D index with the passed column index x and row index y. It is created the first time that it is needed. """
+
+        if (index_2d := _index_2d_cache.get((x, y))) is None:
+            index_2d = Index2D(x, y)
+            _index_2d_cache[(x, y)] = index_2d
+
+        return index_2d
+
     @classmethod
     def sign(cls, index_2d: Self) -> Self:
         """ Element-wise sign function. """
 
-        return Index2D(sign(index_2d.x), sign(index_2d.y))
+        return Index2D.of(sign(index_2d.x), sign(index_2d.y))
 
     @override
     def __eq__(self, other: object) -> bool:
-        if not isinstance(other, Index2D):
-            return False
+        # Note: this method replaces the __eq__() method that is generated by the dataclass decorator,
+        # which creates a tuple of the fields of both 2D indices for each comparison and is therefore slower.
+        if other.__class__ is not Index2D:
+            return NotImplemented
 
         return self.x == other.x and self.y == other.y
 
     def __add__(self, other: object) -> Self:
         if isinstance(other, Index2D):
-            return Index2D(self.x + other.x, self.y + other.y)
+            return Index2D.of(self.x + other.x, self.y + other.y)
 
         return NotImplemented
 
@@ -98,7 +151,7 @@ class Index2D:
 
     def __sub__(self, other: object) -> Self:
         if isinstance(other, Index2D):
-            return Index2D(self.x - other.x, self.y - other.y)
+            return Index2D.of(self.x - other.x, self.y - other.y)
 
         return NotImplemented
 
@@ -107,7 +160,7 @@ class Index2D:
 
     def __mul__(self, scalar: object) -> Self:
         if isinstance(scalar, int):
-            return Index2D(self.x * scalar, self.y * scalar)
+            return Index2D.of(self.x * scalar, self.y * scalar)
 
         return NotImplemented
 
@@ -122,10 +175,34 @@ class Index2D:
         return f"({self.x}, {self.y})"
 
 
+_index_2d_cache: Final[dict[tuple[int, int]: Index2D]] = {}  # The shared 2D indices by column index and row index, see Index2D.of().
+
+
+@cache
+def get_index_2d_table(row_count: int, column_count: int) -> tuple[Index2D | None, ...]:
+    """ Return a table with the 2D index of each square of a board with the passed row_count and column_count, indexed by the bit index of the square.
+    The layout of the bit indices is described in the bitboard module. Bit indices that do not correspond to a square map to None.
+
+    The table contains the shared 2D indices, see Index2D.of(), and is created only once for each board shape and is shared by all boards with that shape.
+    """
+
+    index_2d_table: Final[list[Index2D | None]] = [None] * get_bit_index(0, row_count, column_count)
+    for y in range(row_count):
+        for x in range(column_count):
+            index_2d_table[get_bit_index(x, y, column_count)] = Index2D.of(x, y)
+
+    return tuple(index_2d_table)
+
+
 class CheckersBoard:
-    """ Store a checkers board and the pieces on the board. """
+    """ Store a checkers board and the pieces on the board.
+
+    The pieces are stored only in bitboards, which store which squares contain light pieces, dark pieces and kings.
+    The layout of the bitboards is described in the bitboard module.
+    Since there are only four possible checkers pieces, the pieces that are returned by this board are the shared instances LIGHT_MAN, LIGHT_KING, DARK_MAN and DARK_KING.
+    """
 
-    __slots__ = ('row_count', 'column_count', '_list_2d')
+    __slots__ = ('row_count', 'column_count', 'square_bitboard', 'diagonal_rays', 'index_2d_table', '_player_bitboards', '_king_bitboard')
 
     def __init__(self, row_count: int, column_count: int):
         """ Create an empty checkers board that has the passed shape. """
@@ -137,21 +214,148 @@ class CheckersBoard:
 
         self.row_count: Final[int] = row_count  # Number of rows in board.
         self.column_count: Final[int] = column_count  # Number of columns in board.
-        self._list_2d: Final[list[list[CheckersPiece | None]]] = [[None for _ in range(row_count)] for _ in range(column_count)]  # Store checkers pieces.
+        self.square_bitboard: Final[int] = get_square_bitboard(row_count, column_count)  # Bitboard that contains all squares of this board.
+        # Diagonal rays of each square by bit index, see get_diagonal_rays() in the bitboard module. These are used to walk along the diagonals during move generation.
+        self.diagonal_rays: Final[tuple[tuple[tuple[int, ...], ...], ...]] = get_diagonal_rays(row_count, column_count)
+        self.index_2d_table: Final[tuple[Index2D | None, ...]] = get_index_2d_table(row_count, column_count)  # 2D index of each square by bit index, see get_index_2d_table().
+        self._player_bitboards: Final[list[int]] = [0] * len(CheckersPlayer)  # Squares that contain a piece owned by each player, indexed by the value of the player.
+        self._king_bitboard: int = 0  # Squares that contain a king.
+
+    @property
+    def king_bitboard(self) -> int:
+        """ Return a bitboard with the squares that contain a king. """
+
+        return self._king_bitboard
+
+    @property
+    def empty_bitboard(self) -> int:
+        """ Return a bitboard with the squares that do not contain a piece. """
+
+        return self.square_bitboard & ~self.occupied_bitboard
+
+    @property
+    def occupied_bitboard(self) -> int:
+        """ Return a bitboard with the squares that contain a piece. """
+
+        light_bitboard, dark_bitboard = self._player_bitboards
+        return light_bitboard | dark_bitboard
+
+    def get_bitboard(self, player: CheckersPlayer) -> int:
+        """ Return a bitboard with the squares that contain a piece owned by the passed player. """
+
+        return self._player_bitboards[player.value]
+
+    def get_piece_bitboard(self, player: CheckersPlayer, piece_type: CheckersPieceType) -> int:
+        """ Return a bitboard with the squares that contain a piece of the passed piece_type owned by the passed player. """
+
+        if piece_type is CheckersPieceType.KING:
+            return self._player_bitboards[player.value] & self._king_bitboard
+        return self._player_bitboards[player.value] & ~self._king_bitboard
+
+    def count_pieces(self, player: CheckersPlayer, piece_type: CheckersPieceType | None = None) -> int:
+        """ Return the number of pieces of the passed piece_type owned by the passed player on this board. If piece_type is None, then all pieces of the player are counted.
+
+        The pieces are counted by counting the set bits in a bitboard, so the squares of the board do not need to be visited.
+        """
+
+        if piece_type is None:
+            return self._player_bitboards[player.value].bit_count()
+        return self.get_piece_bitboard(player, piece_type).bit_count()
+
+    def clone(self) -> Self:
+        """ Return a copy of this checkers board. Only the bitboards of the board need to be copied. """
+
+        # The new board gets the same cached tables for its shape, so that only the contents of this board are copied.
+        board: Final[CheckersBoard] = CheckersBoard(self.row_count, self.column_count)
+        board.restore_contents(self.save_contents())
+
+        return board
+
+    def clear(self):
+        """ Remove all pieces from this board. """
+
+        # Since the pieces are only stored in the bitboards, clearing the bitboards removes all pieces at once.
+        self._player_bitboards[:] = [0] * len(CheckersPlayer)
+        self._king_bitboard = 0
+
+    def save_contents(self) -> tuple[int, int, int]:
+        """ Return the pieces on this board as a tuple of bitboards: (light bitboard, dark bitboard, king bitboard).
+        The returned tuple can be passed to restore_contents() to put back the pieces as they are now.
+        """
+
+        light_bitboard, dark_bitboard = self._player_bitboards
+        return light_bitboard, dark_bitboard, self._king_bitboard
+
+    def restore_contents(self, contents: tuple[int, int, int]):
+        """ Replace the pieces on this board with the passed contents, which must have been returned by save_contents() of a board with the same shape. """
+
+        light_bitboard, dark_bitboard, self._king_bitboard = contents
+        self._player_bitboards[:] = light_bitboard, dark_bitboard
+
+    def __reduce__(self) -> tuple:
+        """ Copy or pickle only the shape and the contents of this board.
+
+        The copy is created again with __init__(), so that it uses the cached tables for its shape instead of copies of the tables of this board.
+        """
+
+        return self.__class__, (self.row_count, self.column_count), self.save_contents()
+
+    def __setstate__(self, contents: tuple[int, int, int]):
+        """ Restore the contents that were returned by __reduce__() on a copy of a board. """
+
+        self.restore_contents(contents)
 
     def __iter__(self) -> Iterator[tuple[Index2D, CheckersPiece]]:
         """ Yield a tuple containing a checkers piece and its 2d index, for each piece on this board. """
 
-        for x, column in enumerate(self._list_2d):
-            for y, piece in enumerate(column):
-                if piece:
-                    yield Index2D(x, y), piece
+        # Only visit the squares that contain a piece.
+        # The attributes that are used in the loop are looked up only once.
+        index_2d_table: Final[tuple[Index2D | None, ...]] = self.index_2d_table
+        get_piece: Final[Callable[[int], CheckersPiece | None]] = self.get_piece
+        for bit_index in iterate_bit_indices(self.occupied_bitboard):
+            yield index_2d_table[bit_index], get_piece(bit_index)
 
     def __getitem__(self, index: Index2D) -> CheckersPiece | None:
-        return self._list_2d[index.x][index.y]
+        return self.get_piece(index.y * (self.column_count + 1) + index.x)  # Same as get_bit_index(), which is inlined here because this method is called often.
 
     def __setitem__(self, index: Index2D, piece: CheckersPiece | None):
-        self._list_2d[index.x][index.y] = piece
+        self.set_piece(index.y * (self.column_count + 1) + index.x, piece)  # Same as get_bit_index(), which is inlined here because this method is called often.
+
+    def get_piece(self, bit_index: int) -> CheckersPiece | None:
+        """ Return the piece at the square that corresponds to the passed bit_index in the bitboards of this board. Return None if the square is empty.
+
+        This method does the same as indexing this board with a 2D index, but it uses the bit index of the square, which is what the rules work with.
+        """
+
+        bit: Final[int] = 1 << bit_index
+        light_bitboard, dark_bitboard = self._player_bitboards
+        if light_bitboard & bit:
+            return LIGHT_KING if self._king_bitboard & bit else LIGHT_MAN
+        if dark_bitboard & bit:
+            return DARK_KING if self._king_bitboard & bit else DARK_MAN
+        return None
+
+    def set_piece(self, bit_index: int, piece: CheckersPiece | None):
+        """ Put the passed piece at the square that corresponds to the passed bit_index in the bitboards of this board. None means that the square becomes empty.
+
+        This method does the same as assigning to this board with a 2D index, but it uses the bit index of the square, which is what the rules work with.
+        """
+
+        bit: Final[int] = 1 << bit_index
+        player_bitboards: Final[list[int]] = self._player_bitboards
+
+        # Remove previous piece from bitboards.
+        # The owner of the previous piece does not need to be known, since a square can only be part of the bitboard of one player.
+        mask: Final[int] = ~bit
+        light_bitboard, dark_bitboard = player_bitboards
+        player_bitboards[:] = light_bitboard & mask, dark_bitboard & mask
+        self._king_bitboard &= mask
+
+        # Add piece to bitboards.
+        if piece:
+            player_bitboards[piece.owner.value] |= bit
+            if piece.type is CheckersPieceType.KING:
+                self._king_bitboard |= bit
 
     def __contains__(self, index: Index2D) -> bool:
         """ Return True if the passed 2D index is within the bounds of this checkers board. Otherwise, return False.
@@ -163,12 +367,39 @@ class CheckersBoard:
         return 0 <= index.x < self.column_count and 0 <= index.y < self.row_count
 
 
-@dataclass(frozen=True, slots=True)
-class CheckersJump:
-    """ Store an immutable jump that is part of a move in a checkers game. """
+class CheckersBoardView:
+    """ Provide read-only access to a checkers board without copying it.
+
+    The view does not store a copy of the board, so changes to the board are visible through the view.
+    """
+
+    __slots__ = ('_board',)
+
+    def __init__(self, board: CheckersBoard):
+        """ Create a read-only view of the passed board. """
+
+        self._board: Final[CheckersBoard] = board
+
+    @property
+    def row_count(self) -> int:
+        return self._board.row_count
+
+    @property
+    def column_count(self) -> int:
+        return self._board.column_count
+
+    def __iter__(self) -> Iterator[tuple[Index2D, CheckersPiece]]:
+        """ Yield a tuple containing a checkers piece and its 2d index, for each piece on the viewed board. """
+
+        return iter(self._board)
+
+    def __getitem__(self, index: Index2D) -> CheckersPiece | None:
+        return self._board[index]
+
+    def __contains__(self, index: Index2D) -> bool:
+        """ Return True if the passed 2D index is within the bounds of the viewed board. Otherwise, return False. See CheckersBoard.__contains__(). """
 
-    destination: Index2D
-    captured_square: Index2D  # The square that contains the piece that is being captured in this jump.
+        return index in self._board
 
 
 @dataclass(frozen=True, slots=True)